@@ -189,7 +189,8 @@ async def run_screening(
         min_correlation=config.min_correlation,
         max_adf_pvalue=config.max_adf_pvalue,
         include_hurst=config.include_hurst,
-        min_volume_usd=config.min_volume_usd
+        min_volume_usd=config.min_volume_usd,
+        min_composite_score=config.min_composite_score
     )
     
     # Create session info
@@ -230,7 +231,7 @@ def _run_screening_background(session_id: int, config: ScreeningConfig):
         # Update live screener with results IMMEDIATELY (memory is primary source for UI)
         live_screener = get_live_screener()
         with live_screener._lock:
-            live_screener.current_results = results
+            live_screener.current_results = tuple(results)
             # Update last session info
             live_screener.last_session_info = {
                 'id': session_id,
@@ -274,7 +275,8 @@ async def get_screening_results(
     """Get screening results from live screener (in-memory)"""
     try:
         live_screener = get_live_screener()
-        results = live_screener.get_results()
+        # Own list: the shared snapshot is an immutable tuple and is sorted in place below
+        results = list(live_screener.get_results())
         
         # Filter by correlation
         if min_correlation:
@@ -524,7 +526,7 @@ async def get_pair_spread_data(pair_id: int):
             raise HTTPException(status_code=400, detail="Insufficient data for chart")
         
         # Calculate spread using ROLLING beta/alpha (same as backtester)
-        from app.modules.screener.cointegration import CointegrationTester
+        from app.modules.screener.cointegration import CointegrationTester, ols_alpha_beta
         from statsmodels.regression.linear_model import OLS
         import numpy as np
         import pandas as pd
@@ -565,9 +567,11 @@ async def get_pair_spread_data(pair_id: int):
                             rolling_beta,
                             rolling_alpha
                         )
-                        current_zscore_series = CointegrationTester.calculate_zscore(current_spread)
-                        if len(current_zscore_series) > 0:
-                            rolling_zscore_list.append(float(current_zscore_series.iloc[-1]))
+                        current_zscore_values = CointegrationTester.calculate_zscore(
+                            current_spread, as_numpy=True
+                        )
+                        if len(current_zscore_values) > 0:
+                            rolling_zscore_list.append(float(current_zscore_values[-1]))
                             rolling_spread_list.append(float(current_spread.iloc[-1]))
                             rolling_dates.append(aligned.index[i])
                 except Exception:
@@ -579,11 +583,7 @@ async def get_pair_spread_data(pair_id: int):
             spread = pd.Series(rolling_spread_list, index=rolling_dates)
         else:
             # Fallback to global beta if rolling calculation fails
-            X = aligned['b'].values.reshape(-1, 1)
-            y = aligned['a'].values
-            X_with_const = np.column_stack([np.ones(len(X)), X])
-            model = OLS(y, X_with_const).fit()
-            alpha = model.params[0]
+            alpha, _ = ols_alpha_beta(aligned['a'].values, aligned['b'].values)
             beta = pair['beta']
             spread = CointegrationTester.calculate_spread(price_a, price_b, beta, alpha)
             zscore = CointegrationTester.calculate_zscore(spread)
@@ -1292,26 +1292,19 @@ async def export_pair_data(pair_id: int, format: str = "csv"):
             price_b = data_loader.get_price_series(pair['asset_b'], days=lookback_days, db=None)
             
             if len(price_a) >= 50 and len(price_b) >= 50:
-                from app.modules.screener.cointegration import CointegrationTester
-                from statsmodels.regression.linear_model import OLS
-                import numpy as np
-                import pandas as pd
+                from app.modules.screener.cointegration import CointegrationTester, ols_alpha_beta
+                from app.modules.screener.correlation import align_prices
                 
-                aligned = pd.DataFrame({'a': price_a, 'b': price_b}).dropna()
-                X = aligned['b'].values.reshape(-1, 1)
-                y = aligned['a'].values
-                X_with_const = np.column_stack([np.ones(len(X)), X])
-                model = OLS(y, X_with_const).fit()
-                alpha = model.params[0]
+                alpha, _ = ols_alpha_beta(*align_prices(price_a, price_b))
                 beta = pair['beta']
                 
                 spread = CointegrationTester.calculate_spread(price_a, price_b, beta, alpha)
-                zscore = CointegrationTester.calculate_zscore(spread)
+                zscore = CointegrationTester.calculate_zscore(spread, as_numpy=True)
                 
                 aligned_data = pd.DataFrame({
                     'date': spread.index,
                     'spread': spread.values,
-                    'zscore': zscore.values
+                    'zscore': zscore
                 })
                 spread_data = aligned_data
         except Exception as e:
@@ -15,6 +15,7 @@ class ScreeningConfigRequest(BaseModel):
     max_adf_pvalue: float = Field(default=0.10, ge=0.0, le=1.0)
     include_hurst: bool = False
     min_volume_usd: float = Field(default=1_000_000, ge=0, description="Minimum daily volume in USD")
+    min_composite_score: float = Field(default=0.0, ge=0.0, le=100.0, description="Minimum composite score (0 = keep all pairs)")
 
 
 class PairResult(BaseModel):
@@ -0,0 +1,668 @@
+"""
+Compiled kernels for the backtester hot loop
+"""
+from typing import NamedTuple, Optional
+
+import numpy as np
+from numba import njit, prange
+
+NS_PER_DAY = 86_400_000_000_000
+
+# Position / side codes
+FLAT = 0
+LONG = 1
+SHORT = -1
+
+# Signal codes
+SIGNAL_HOLD = 0
+SIGNAL_LONG_SPREAD = 1
+SIGNAL_SHORT_SPREAD = 2
+SIGNAL_CLOSE = 3
+
+# Stop loss / take profit type codes
+LEVEL_NONE = -1
+LEVEL_PERCENT = 0
+LEVEL_ZSCORE = 1
+LEVEL_ATR = 2
+
+LEVEL_TYPE_CODES = {'percent': LEVEL_PERCENT, 'zscore': LEVEL_ZSCORE, 'atr': LEVEL_ATR}
+
+# Exit reason codes
+EXIT_OPEN = -1
+EXIT_UNKNOWN = 0
+EXIT_STOP_LOSS = 1
+EXIT_TAKE_PROFIT = 2
+EXIT_END_OF_PERIOD = 3
+EXIT_OPEN_AT_END = 4
+
+EXIT_REASON_NAMES = {
+    EXIT_UNKNOWN: 'unknown',
+    EXIT_STOP_LOSS: 'stop_loss',
+    EXIT_TAKE_PROFIT: 'take_profit',
+    EXIT_END_OF_PERIOD: 'end_of_period',
+}
+
+
+
+class TradeBuffer(NamedTuple):
+    """Preallocated struct-of-arrays trade records (one slot per trade)"""
+    entry_idx: np.ndarray
+    exit_idx: np.ndarray
+    side: np.ndarray
+    exit_reason: np.ndarray
+    entry_price_a: np.ndarray
+    entry_price_b: np.ndarray
+    entry_zscore: np.ndarray
+    entry_spread: np.ndarray
+    quantity_a: np.ndarray
+    quantity_b: np.ndarray
+    dollar_a: np.ndarray
+    dollar_b: np.ndarray
+    trade_capital: np.ndarray
+    beta_used: np.ndarray
+    alpha_used: np.ndarray
+    take_profit_target: np.ndarray
+    exit_zscore: np.ndarray
+    pnl: np.ndarray
+    mae: np.ndarray
+
+
+def allocate_trade_buffer(capacity: int, n_pairs: Optional[int] = None) -> TradeBuffer:
+    """Allocate a TradeBuffer with room for `capacity` trades (per pair, if n_pairs is given)"""
+    shape = capacity if n_pairs is None else (n_pairs, capacity)
+    return TradeBuffer(
+        entry_idx=np.full(shape, -1, dtype=np.int64),
+        exit_idx=np.full(shape, -1, dtype=np.int64),
+        side=np.zeros(shape, dtype=np.int8),
+        exit_reason=np.full(shape, EXIT_OPEN, dtype=np.int8),
+        **{name: np.full(shape, np.nan) for name in TradeBuffer._fields[4:]}
+    )
+
+
+class RebalanceBuffer(NamedTuple):
+    """Preallocated struct-of-arrays hedge rebalance records"""
+    trade: np.ndarray
+    bar_idx: np.ndarray
+    old_beta: np.ndarray
+    new_beta: np.ndarray
+    beta_drift_pct: np.ndarray
+    delta_quantity_a: np.ndarray
+    delta_quantity_b: np.ndarray
+    cost: np.ndarray
+    new_quantity_a: np.ndarray
+    new_quantity_b: np.ndarray
+
+
+def allocate_rebalance_buffer(capacity: int, n_pairs: Optional[int] = None) -> RebalanceBuffer:
+    """Allocate a RebalanceBuffer with room for `capacity` rebalances (per pair, if n_pairs is given)"""
+    shape = capacity if n_pairs is None else (n_pairs, capacity)
+    return RebalanceBuffer(
+        trade=np.empty(shape, dtype=np.int64),
+        bar_idx=np.empty(shape, dtype=np.int64),
+        **{name: np.empty(shape) for name in RebalanceBuffer._fields[2:]}
+    )
+
+
+@njit(cache=True)
+def rolling_beta_alpha(price_a, price_b, window, min_periods):
+    """
+    Rolling OLS of price_a on price_b for every bar in a single sweep
+
+    The value for bar i is fitted on the `window` bars before it (bar i itself is
+    excluded). Running sums of x, y, x*x and x*y are updated in O(1) per bar as
+    bars enter and leave the window, and the 2x2 normal equations are solved in
+    closed form. Warm-up bars use all the history available; bars with fewer than
+    `min_periods` observations get NaN.
+
+    Args:
+        price_a: Prices of asset A (dependent variable)
+        price_b: Prices of asset B (regressor)
+        window: Regression window in bars
+        min_periods: Minimum number of observations for a fit
+
+    Returns:
+        Tuple of (betas, alphas) arrays aligned with the input
+    """
+    n = len(price_a)
+    betas = np.full(n, np.nan)
+    alphas = np.full(n, np.nan)
+    if n < 2:
+        return betas, alphas
+
+    # Center on full-sample means to keep the running sums well conditioned
+    x_shift = price_b.mean()
+    y_shift = price_a.mean()
+
+    count = 0
+    sum_x = 0.0
+    sum_y = 0.0
+    sum_xx = 0.0
+    sum_xy = 0.0
+    for i in range(1, n):
+        x = price_b[i - 1] - x_shift
+        y = price_a[i - 1] - y_shift
+        count += 1
+        sum_x += x
+        sum_y += y
+        sum_xx += x * x
+        sum_xy += x * y
+        if i > window:
+            x = price_b[i - 1 - window] - x_shift
+            y = price_a[i - 1 - window] - y_shift
+            count -= 1
+            sum_x -= x
+            sum_y -= y
+            sum_xx -= x * x
+            sum_xy -= x * y
+
+        det = count * sum_xx - sum_x * sum_x
+        if count >= min_periods and det > 0:
+            beta = (count * sum_xy - sum_x * sum_y) / det
+            betas[i] = beta
+            alphas[i] = (sum_xx * sum_y - sum_x * sum_xy) / det + y_shift - beta * x_shift
+
+    return betas, alphas
+
+
+@njit(cache=True)
+def zscore_take_profit_target(entry_z: float, take_profit: float) -> float:
+    """
+    Convert user-facing take_profit (z-score) into an absolute target z-score level.
+
+    Semantics:
+    - take_profit >= 0: target is on the opposite side AFTER crossing 0
+      Example: entry_z=+2 (SHORT), take_profit=+1 -> target=-1
+               entry_z=-2 (LONG),  take_profit=+1 -> target=+1
+    - take_profit < 0: target is on the same side BEFORE reaching 0
+      Example: entry_z=+2 (SHORT), take_profit=-1 -> target=+1
+               entry_z=-2 (LONG),  take_profit=-1 -> target=-1
+    """
+    if take_profit == 0:
+        return 0.0
+
+    if entry_z > 0:
+        entry_sign = 1.0
+    elif entry_z < 0:
+        entry_sign = -1.0
+    else:
+        # Should not happen (we enter only beyond a threshold), but keep legacy behavior if it does.
+        return take_profit
+
+    magnitude = abs(take_profit)
+    if take_profit >= 0:
+        return -entry_sign * magnitude
+    return entry_sign * magnitude
+
+
+@njit(cache=True)
+def _trade_pnl(side, price_a, price_b, entry_price_a, entry_price_b,
+               quantity_a, quantity_b, dollar_a, dollar_b, tx_cost):
+    """Net P&L of the open trade if closed at the given prices (exit costs included)"""
+    if side == LONG:
+        pnl_a = (price_a - entry_price_a) * quantity_a
+        pnl_b = (entry_price_b - price_b) * quantity_b
+    else:
+        pnl_a = (entry_price_a - price_a) * quantity_a
+        pnl_b = (price_b - entry_price_b) * quantity_b
+    exit_cost = (dollar_a + dollar_b) * tx_cost
+    return pnl_a + pnl_b - exit_cost
+
+
+@njit(cache=True)
+def _close_trade(trades, t, exit_idx, exit_zscore, pnl, mae, exit_reason):
+    """Record the outcome of trade t (exit_idx is -1 for a position left open)"""
+    trades.exit_idx[t] = exit_idx
+    trades.exit_reason[t] = exit_reason
+    trades.exit_zscore[t] = exit_zscore
+    trades.pnl[t] = pnl
+    trades.mae[t] = mae
+
+
+@njit(cache=True)
+def _level_hits(
+    position, pnl_pct, z, spread_move, atr, take_profit_target,
+    has_stop_loss, stop_loss, stop_loss_type_i,
+    has_take_profit, take_profit, take_profit_type_i
+):
+    """
+    Whether the stop loss / take profit levels are hit, as branch-free comparisons
+
+    Multiplying by the position sign (+1 long, -1 short) folds the long/short
+    variants of each check into one comparison. A NaN atr never triggers an
+    ATR level. take_profit_target is the absolute z-score target fixed at entry.
+
+    Returns:
+        Tuple of (stop_hit, take_hit)
+    """
+    stop_hit = has_stop_loss & (
+        ((stop_loss_type_i == LEVEL_PERCENT) & (pnl_pct <= -stop_loss))
+        | ((stop_loss_type_i == LEVEL_ZSCORE) & (position * z >= stop_loss))
+        | ((stop_loss_type_i == LEVEL_ATR) & (abs(spread_move) >= stop_loss * atr))
+    )
+    take_hit = has_take_profit & (
+        ((take_profit_type_i == LEVEL_PERCENT) & (pnl_pct >= take_profit))
+        | ((take_profit_type_i == LEVEL_ZSCORE) & (position * z >= position * take_profit_target))
+        | ((take_profit_type_i == LEVEL_ATR) & (position * spread_move >= take_profit * atr))
+    )
+    return stop_hit, take_hit
+
+
+@njit(cache=True)
+def _run_backtest_core(
+    prices_a, prices_b, zscore, spread, atr, valid, ts, beta_arr, alpha_arr,
+    entry_threshold, has_stop_loss, stop_loss, stop_loss_type_i,
+    has_take_profit, take_profit, take_profit_type_i,
+    enable_rebalancing, rebalancing_frequency_days, rebalancing_threshold,
+    tx_cost, init_capital, pos_size_pct, equity, trades, rebalances
+):
+    """
+    Bar-by-bar pairs trading state machine
+
+    The equity curve is written into the preallocated `equity` array (one slot
+    per bar, float32; capital itself is accumulated in float64). Trades and rebalances are written in place into the given
+    TradeBuffer / RebalanceBuffer (capacity of at least one slot per bar); the
+    caller turns the first n_trades / n_rebalances entries into dicts.
+
+    Returns:
+        Tuple of (n_trades, n_rebalances, capital, total_rebalancing_costs)
+    """
+    n = len(prices_a)
+
+    n_trades = 0
+    n_rebalances = 0
+
+    capital = init_capital
+    total_rebalancing_costs = 0.0
+    position = FLAT
+    open_trade = -1
+    # Every trade uses the same fixed share of INITIAL capital
+    trade_capital = init_capital * (pos_size_pct / 100.0)
+
+    # Open trade state kept in locals (mirrored into the trade buffer on change)
+    entry_price_a = 0.0
+    entry_price_b = 0.0
+    entry_spread = 0.0
+    quantity_a = 0.0
+    quantity_b = 0.0
+    dollar_a = 0.0
+    dollar_b = 0.0
+    entry_beta = 0.0
+    take_profit_target = np.nan
+    max_adverse_excursion = 0.0
+    last_rebalance_i = -1
+    last_valid_i = -1
+
+    for i in range(n):
+        if not valid[i]:
+            equity[i] = capital
+            continue
+
+        last_valid_i = i
+        price_a = prices_a[i]
+        price_b = prices_b[i]
+        z = zscore[i]
+        s = spread[i]
+        signal = SIGNAL_HOLD
+
+        if position != FLAT:
+            # Current unrealized P&L
+            if position == LONG:
+                current_total_pnl = (price_a - entry_price_a) * quantity_a + (entry_price_b - price_b) * quantity_b
+            else:
+                current_total_pnl = (entry_price_a - price_a) * quantity_a + (price_b - entry_price_b) * quantity_b
+
+            # Update maximum adverse excursion (track worst drawdown)
+            if current_total_pnl < max_adverse_excursion:
+                max_adverse_excursion = current_total_pnl
+
+            # Rebalance the hedge when enough time has passed and beta has drifted
+            if enable_rebalancing:
+                if last_rebalance_i >= 0:
+                    days_since_last_rebalance = (ts[i] - ts[last_rebalance_i]) // NS_PER_DAY
+                else:
+                    days_since_last_rebalance = (ts[i] - ts[trades.entry_idx[open_trade]]) // NS_PER_DAY
+
+                if days_since_last_rebalance >= rebalancing_frequency_days:
+                    current_beta = beta_arr[i]
+                    beta_drift_pct = abs(current_beta - entry_beta) / entry_beta if entry_beta > 0 else 0.0
+
+                    if beta_drift_pct >= rebalancing_threshold:
+                        new_quantity_a = trade_capital / (price_a + current_beta * price_b)
+                        new_quantity_b = current_beta * new_quantity_a
+                        delta_quantity_a = new_quantity_a - quantity_a
+                        delta_quantity_b = new_quantity_b - quantity_b
+                        rebalance_notional = abs(delta_quantity_a * price_a) + abs(delta_quantity_b * price_b)
+                        rebalance_cost = rebalance_notional * tx_cost
+
+                        quantity_a = new_quantity_a
+                        quantity_b = new_quantity_b
+                        dollar_a = new_quantity_a * price_a
+                        dollar_b = new_quantity_b * price_b
+                        trades.quantity_a[open_trade] = quantity_a
+                        trades.quantity_b[open_trade] = quantity_b
+                        trades.dollar_a[open_trade] = dollar_a
+                        trades.dollar_b[open_trade] = dollar_b
+
+                        entry_beta = current_beta
+                        capital -= rebalance_cost
+                        total_rebalancing_costs += rebalance_cost
+                        last_rebalance_i = i
+
+                        # old_beta is recorded after the update, as it always has been
+                        rebalances.old_beta[n_rebalances] = entry_beta
+                        rebalances.new_beta[n_rebalances] = current_beta
+                        rebalances.beta_drift_pct[n_rebalances] = beta_drift_pct * 100
+                        rebalances.delta_quantity_a[n_rebalances] = delta_quantity_a
+                        rebalances.delta_quantity_b[n_rebalances] = delta_quantity_b
+                        rebalances.cost[n_rebalances] = rebalance_cost
+                        rebalances.new_quantity_a[n_rebalances] = new_quantity_a
+                        rebalances.new_quantity_b[n_rebalances] = new_quantity_b
+                        rebalances.trade[n_rebalances] = open_trade
+                        rebalances.bar_idx[n_rebalances] = i
+                        n_rebalances += 1
+
+            # Exit ONLY via Stop Loss or Take Profit (no exit threshold)
+            current_pnl_pct = (current_total_pnl / init_capital) * 100
+
+            stop_hit, take_hit = _level_hits(
+                position, current_pnl_pct, z, s - entry_spread, atr[i], take_profit_target,
+                has_stop_loss, stop_loss, stop_loss_type_i,
+                has_take_profit, take_profit, take_profit_type_i
+            )
+            if stop_hit | take_hit:
+                signal = SIGNAL_CLOSE
+        else:
+            # No position - check entry conditions
+            if z <= -entry_threshold:
+                signal = SIGNAL_LONG_SPREAD
+            elif z >= entry_threshold:
+                signal = SIGNAL_SHORT_SPREAD
+
+        if signal == SIGNAL_LONG_SPREAD or signal == SIGNAL_SHORT_SPREAD:
+            # Beta hedge + dollar neutral on a fixed share of INITIAL capital:
+            # quantity_a = trade_capital / (price_a + beta * price_b), quantity_b = beta * quantity_a
+            current_beta = beta_arr[i]
+            quantity_a = trade_capital / (price_a + current_beta * price_b)
+            quantity_b = current_beta * quantity_a
+            dollar_a = quantity_a * price_a
+            dollar_b = quantity_b * price_b
+
+            capital -= (dollar_a + dollar_b) * tx_cost
+
+            open_trade = n_trades
+            n_trades += 1
+            position = LONG if signal == SIGNAL_LONG_SPREAD else SHORT
+            entry_price_a = price_a
+            entry_price_b = price_b
+            entry_spread = s
+            entry_beta = current_beta
+            # The z-score take profit level only depends on the entry z-score
+            if has_take_profit and take_profit_type_i == LEVEL_ZSCORE:
+                take_profit_target = zscore_take_profit_target(z, take_profit)
+            else:
+                take_profit_target = np.nan
+            max_adverse_excursion = 0.0
+            last_rebalance_i = -1
+
+            trades.entry_idx[open_trade] = i
+            trades.side[open_trade] = position
+            trades.entry_price_a[open_trade] = price_a
+            trades.entry_price_b[open_trade] = price_b
+            trades.entry_zscore[open_trade] = z
+            trades.entry_spread[open_trade] = s
+            trades.quantity_a[open_trade] = quantity_a
+            trades.quantity_b[open_trade] = quantity_b
+            trades.dollar_a[open_trade] = dollar_a
+            trades.dollar_b[open_trade] = dollar_b
+            trades.trade_capital[open_trade] = trade_capital
+            trades.beta_used[open_trade] = current_beta
+            trades.alpha_used[open_trade] = alpha_arr[i]
+            trades.take_profit_target[open_trade] = take_profit_target
+
+        elif signal == SIGNAL_CLOSE:
+            total_pnl = _trade_pnl(
+                position, price_a, price_b, entry_price_a, entry_price_b,
+                quantity_a, quantity_b, dollar_a, dollar_b, tx_cost
+            )
+            capital += total_pnl
+
+            # Determine exit reason from the realized P&L (after exit costs)
+            pnl_pct = (total_pnl / init_capital) * 100
+            # Same checks, except that a zero ATR does not count as a level
+            stop_hit, take_hit = _level_hits(
+                position, pnl_pct, z, s - entry_spread, atr[i] if atr[i] != 0 else np.nan,
+                take_profit_target,
+                has_stop_loss, stop_loss, stop_loss_type_i,
+                has_take_profit, take_profit, take_profit_type_i
+            )
+            exit_reason = EXIT_STOP_LOSS if stop_hit else (EXIT_TAKE_PROFIT if take_hit else EXIT_UNKNOWN)
+
+            _close_trade(trades, open_trade, i, z, total_pnl, max_adverse_excursion, exit_reason)
+            position = FLAT
+            open_trade = -1
+            max_adverse_excursion = 0.0
+
+        equity[i] = capital
+
+    # Position still open at the end: close only if it would be acceptable to do so
+    if position != FLAT:
+        last = n - 1
+        final_zscore = zscore[last_valid_i]
+        total_pnl = _trade_pnl(
+            position, prices_a[last], prices_b[last], entry_price_a, entry_price_b,
+            quantity_a, quantity_b, dollar_a, dollar_b, tx_cost
+        )
+
+        should_close = False
+        if has_take_profit:
+            if take_profit_type_i == LEVEL_ZSCORE:
+                if (position == LONG and final_zscore >= take_profit_target) or \
+                   (position == SHORT and final_zscore <= take_profit_target):
+                    should_close = True
+            elif total_pnl > 0:
+                should_close = True
+        elif total_pnl > 0:
+            should_close = True
+
+        # Always close if stop loss is set (to limit losses)
+        if has_stop_loss and total_pnl < 0:
+            should_close = True
+
+        if should_close:
+            capital += total_pnl
+            equity[last] = capital
+            _close_trade(trades, open_trade, last, final_zscore, total_pnl, max_adverse_excursion, EXIT_END_OF_PERIOD)
+        else:
+            _close_trade(trades, open_trade, -1, final_zscore, total_pnl, max_adverse_excursion, EXIT_OPEN_AT_END)
+
+    return n_trades, n_rebalances, capital, total_rebalancing_costs
+
+
+@njit(cache=True)
+def _trade_buffer_row(trades, p):
+    """View of pair p's slots in a 2-D TradeBuffer"""
+    return TradeBuffer(
+        trades.entry_idx[p], trades.exit_idx[p], trades.side[p], trades.exit_reason[p],
+        trades.entry_price_a[p], trades.entry_price_b[p], trades.entry_zscore[p],
+        trades.entry_spread[p], trades.quantity_a[p], trades.quantity_b[p],
+        trades.dollar_a[p], trades.dollar_b[p], trades.trade_capital[p],
+        trades.beta_used[p], trades.alpha_used[p], trades.take_profit_target[p], trades.exit_zscore[p],
+        trades.pnl[p], trades.mae[p]
+    )
+
+
+@njit(cache=True)
+def _rebalance_buffer_row(rebalances, p):
+    """View of pair p's slots in a 2-D RebalanceBuffer"""
+    return RebalanceBuffer(
+        rebalances.trade[p], rebalances.bar_idx[p], rebalances.old_beta[p],
+        rebalances.new_beta[p], rebalances.beta_drift_pct[p],
+        rebalances.delta_quantity_a[p], rebalances.delta_quantity_b[p],
+        rebalances.cost[p], rebalances.new_quantity_a[p], rebalances.new_quantity_b[p]
+    )
+
+
+@njit(parallel=True, cache=True)
+def _run_backtest_batch(
+    prices_a, prices_b, zscore, spread, atr, valid, ts, beta_arr, alpha_arr, lengths,
+    entry_threshold, has_stop_loss, stop_loss, stop_loss_type_i,
+    has_take_profit, take_profit, take_profit_type_i,
+    enable_rebalancing, rebalancing_frequency_days, rebalancing_threshold,
+    tx_cost, init_capital, pos_size_pct, equity, trades, rebalances
+):
+    """
+    Run _run_backtest_core for many pairs in parallel
+
+    Per-bar inputs are (n_pairs, n_bars) matrices right-padded to the longest
+    pair; lengths holds each pair's real number of bars. The equity matrix and
+    buffers are 2-D (one row per pair) and filled in place.
+
+    Returns:
+        Tuple of (n_trades, n_rebalances, capital, total_rebalancing_costs),
+        one entry per pair
+    """
+    n_pairs = prices_a.shape[0]
+    n_trades = np.zeros(n_pairs, dtype=np.int64)
+    n_rebalances = np.zeros(n_pairs, dtype=np.int64)
+    capital = np.empty(n_pairs)
+    total_rebalancing_costs = np.empty(n_pairs)
+
+    for p in prange(n_pairs):
+        m = lengths[p]
+        n_trades[p], n_rebalances[p], capital[p], total_rebalancing_costs[p] = _run_backtest_core(
+            prices_a[p, :m], prices_b[p, :m], zscore[p, :m], spread[p, :m], atr[p, :m],
+            valid[p, :m], ts[p, :m], beta_arr[p, :m], alpha_arr[p, :m],
+            entry_threshold, has_stop_loss, stop_loss, stop_loss_type_i,
+            has_take_profit, take_profit, take_profit_type_i,
+            enable_rebalancing, rebalancing_frequency_days, rebalancing_threshold,
+            tx_cost, init_capital, pos_size_pct, equity[p, :m],
+            _trade_buffer_row(trades, p), _rebalance_buffer_row(rebalances, p)
+        )
+
+    return n_trades, n_rebalances, capital, total_rebalancing_costs
+
+
+@njit(cache=True, error_model='numpy')
+def equity_stats(equity):
+    """
+    Bar-return mean / sample std (ddof=1) and max drawdown in one pass over the equity curve
+
+    Returns are accumulated with Welford's method and the drawdown against the
+    running maximum is tracked in the same loop, with no intermediate returns
+    array. Equity may be stored as float32; all accumulation is done in float64.
+    Divisions follow NumPy semantics, so a zero running maximum yields a NaN
+    drawdown that is skipped (as the pandas version did) instead of raising.
+
+    Args:
+        equity: Equity value per bar
+
+    Returns:
+        Tuple of (return_mean, return_std, n_returns, max_drawdown), max_drawdown
+        as a positive fraction
+    """
+    n_returns = 0
+    return_mean = 0.0
+    m2 = 0.0
+    max_drawdown = 0.0
+    running_max = np.float64(equity[0]) if len(equity) > 0 else 0.0
+    previous = running_max
+    for i in range(len(equity)):
+        value = np.float64(equity[i])
+        if value > running_max:
+            running_max = value
+        drawdown = (value - running_max) / running_max
+        if drawdown < max_drawdown:
+            max_drawdown = drawdown
+        if i > 0:
+            r = value / previous - 1.0
+            n_returns += 1
+            delta = r - return_mean
+            return_mean += delta / n_returns
+            m2 += delta * (r - return_mean)
+        previous = value
+    return_std = np.sqrt(m2 / (n_returns - 1)) if n_returns > 1 else np.nan
+    return return_mean, return_std, n_returns, abs(max_drawdown)
+
+
+@njit(cache=True, error_model='numpy')
+def running_max_drawdown(equity):
+    """
+    Max drawdown against the running maximum in one pass over the equity curve
+
+    Same drawdown tracking as equity_stats, without the return accumulation,
+    for callers that only need the drawdown.
+
+    Args:
+        equity: Equity value per bar
+
+    Returns:
+        Max drawdown as a positive fraction
+    """
+    max_drawdown = 0.0
+    running_max = np.float64(equity[0]) if len(equity) > 0 else 0.0
+    for i in range(len(equity)):
+        value = np.float64(equity[i])
+        if value > running_max:
+            running_max = value
+        drawdown = (value - running_max) / running_max
+        if drawdown < max_drawdown:
+            max_drawdown = drawdown
+    return abs(max_drawdown)
+
+
+@njit(cache=True)
+def trade_stats(pnl, mae, mae_pct):
+    """
+    Trade-level statistics in one pass over the trade columns
+
+    A NaN pnl marks a position still open (not counted as closed); a NaN mae
+    marks a trade without MAE data.
+
+    Args:
+        pnl: Realized P&L per trade
+        mae: Maximum adverse excursion per trade
+        mae_pct: MAE as percentage of trade capital per trade
+
+    Returns:
+        Tuple of (n_closed, n_wins, n_losses, gross_profit, gross_loss, mae_mean,
+        mae_min, mae_pct_mean, mae_pct_min), gross_loss as a positive amount
+    """
+    n_closed = 0
+    n_wins = 0
+    n_losses = 0
+    gross_profit = 0.0
+    gross_loss = 0.0
+    n_mae = 0
+    mae_sum = 0.0
+    mae_min = np.inf
+    mae_pct_sum = 0.0
+    mae_pct_min = np.inf
+    for t in range(len(pnl)):
+        if not np.isnan(mae[t]):
+            n_mae += 1
+            mae_sum += mae[t]
+            mae_pct_sum += mae_pct[t]
+            if mae[t] < mae_min:
+                mae_min = mae[t]
+            if mae_pct[t] < mae_pct_min:
+                mae_pct_min = mae_pct[t]
+        if np.isnan(pnl[t]):
+            continue
+        n_closed += 1
+        if pnl[t] > 0:
+            n_wins += 1
+            gross_profit += pnl[t]
+        elif pnl[t] < 0:
+            n_losses += 1
+            gross_loss += pnl[t]
+
+    if n_mae > 0:
+        mae_mean = mae_sum / n_mae
+        mae_pct_mean = mae_pct_sum / n_mae
+    else:
+        mae_mean = mae_min = mae_pct_mean = mae_pct_min = 0.0
+
+    return (
+        n_closed, n_wins, n_losses, gross_profit, abs(gross_loss),
+        mae_mean, mae_min, mae_pct_mean, mae_pct_min
+    )
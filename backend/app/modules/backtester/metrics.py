@@ -1,10 +1,104 @@
 """
 Metrics calculation for backtesting
 """
-from typing import List, Dict
+from dataclasses import dataclass
+import math
+from typing import List, Dict, Union
 import pandas as pd
 import numpy as np
 
+from ._kernels import equity_stats, running_max_drawdown, trade_stats
+
+# Annualization factor for daily returns; 365 for crypto (24/7 trading). A plain
+# float, so scaling the scalar Sharpe results never goes through numpy dispatch
+SQRT_365 = math.sqrt(365.0)
+
+
+@dataclass
+class TradeLog:
+    """
+    Per-trade columns used by the metrics, stored as parallel arrays (one entry per trade)
+    
+    Attributes:
+        pnl: Realized P&L per trade (NaN for positions still open)
+        mae: Maximum adverse excursion per trade (NaN if missing)
+        mae_pct: MAE as percentage of trade capital per trade (NaN if missing)
+    """
+    pnl: np.ndarray
+    mae: np.ndarray
+    mae_pct: np.ndarray
+    
+    def __post_init__(self):
+        self.pnl = np.asarray(self.pnl, dtype=float)
+        self.mae = np.asarray(self.mae, dtype=float)
+        self.mae_pct = np.asarray(self.mae_pct, dtype=float)
+    
+    @classmethod
+    def from_trades(cls, trades: List[Dict]) -> 'TradeLog':
+        """
+        Build the trade columns in a single pass over the trade dicts
+        
+        Args:
+            trades: List of trade dictionaries with 'pnl', 'max_adverse_excursion'
+                and 'mae_pct' keys
+            
+        Returns:
+            TradeLog with NaN pnl for open positions (None pnl) and NaN mae / mae_pct
+            for trades without MAE data
+        """
+        n = len(trades)
+        pnl = np.full(n, np.nan)
+        mae = np.full(n, np.nan)
+        mae_pct = np.full(n, np.nan)
+        for i, t in enumerate(trades):
+            if t.get('pnl') is not None:
+                pnl[i] = t['pnl']
+            if t.get('max_adverse_excursion') is not None:
+                mae[i] = t['max_adverse_excursion']
+                mae_pct[i] = t.get('mae_pct', 0)
+        return cls(pnl=pnl, mae=mae, mae_pct=mae_pct)
+
+
+def _as_trade_log(trades: Union[TradeLog, List[Dict]]) -> TradeLog:
+    """Accept either a TradeLog or the legacy list of trade dicts"""
+    return trades if isinstance(trades, TradeLog) else TradeLog.from_trades(trades)
+
+
+def _trade_metrics(trades: TradeLog) -> Dict[str, float]:
+    """
+    Win rate, profit factor, average win / loss and MAE metrics from the trade columns
+    
+    Args:
+        trades: TradeLog with the per-trade pnl, mae and mae_pct columns
+        
+    Returns:
+        Dictionary of trade-level metrics
+    """
+    (
+        n_closed, n_wins, n_losses, gross_profit, gross_loss,
+        mae_mean, mae_min, mae_pct_mean, mae_pct_min
+    ) = trade_stats(trades.pnl, trades.mae, trades.mae_pct)
+    
+    if gross_loss == 0:
+        # Return a large number instead of inf for JSON compatibility
+        # This represents "perfect" profit factor (no losses)
+        profit_factor = 999999.0 if gross_profit > 0 else 0.0
+    else:
+        profit_factor = gross_profit / gross_loss
+    
+    return {
+        'win_rate': (n_wins / n_closed) * 100 if n_closed else 0.0,
+        'profit_factor': profit_factor,
+        'gross_profit': gross_profit,
+        'gross_loss': gross_loss,
+        'avg_win': gross_profit / n_wins if n_wins else 0.0,
+        'avg_loss': gross_loss / n_losses if n_losses else 0.0,  # Positive number
+        'avg_mae': mae_mean,
+        'max_mae': mae_min,  # Min because MAE is negative
+        'avg_mae_pct': mae_pct_mean,
+        'max_mae_pct': mae_pct_min  # Min because MAE % is negative
+    }
+
 
 class BacktestMetrics:
     """Calculate backtest performance metrics"""
@@ -21,11 +115,17 @@ class BacktestMetrics:
         Returns:
             Sharpe ratio
         """
-        if len(returns) == 0 or returns.std() == 0:
+        # Plain ndarray reductions (NaN skipped, sample std) instead of pandas nanops dispatch
+        values = np.asarray(returns, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return 0.0
+        
+        std = values.std(ddof=1) if values.size > 1 else np.nan
+        if std == 0:
             return 0.0
         
-        excess_returns = returns - risk_free_rate
-        return np.sqrt(365) * excess_returns.mean() / returns.std()  # 365 for crypto (24/7 trading)
+        return SQRT_365 * (values.mean() - risk_free_rate) / std
     
     @staticmethod
     def calculate_max_drawdown(equity_curve: pd.Series) -> float:
@@ -41,99 +141,63 @@ class BacktestMetrics:
         if len(equity_curve) == 0:
             return 0.0
         
-        running_max = equity_curve.expanding().max()
-        drawdown = (equity_curve - running_max) / running_max
-        return abs(drawdown.min()) * 100
+        # Running maximum and drawdown in one compiled pass, no intermediate Series
+        return running_max_drawdown(np.asarray(equity_curve, dtype=float)) * 100
     
     @staticmethod
-    def calculate_win_rate(trades: List[Dict]) -> float:
+    def calculate_win_rate(trades: Union[TradeLog, List[Dict]]) -> float:
         """
         Calculate win rate
         
         Args:
-            trades: List of trade dictionaries with 'pnl' key
+            trades: TradeLog or list of trade dictionaries with 'pnl' key
             
         Returns:
             Win rate as a percentage
         """
-        if not trades:
-            return 0.0
-        
-        # Filter out trades with None pnl (open positions)
-        closed_trades = [t for t in trades if t.get('pnl') is not None]
-        if not closed_trades:
-            return 0.0
-        
-        winning_trades = [t for t in closed_trades if t.get('pnl', 0) > 0]
-        return (len(winning_trades) / len(closed_trades)) * 100
+        return BacktestMetrics.calculate_all(trades)['win_rate']
     
     @staticmethod
-    def calculate_profit_factor(trades: List[Dict]) -> float:
+    def calculate_profit_factor(trades: Union[TradeLog, List[Dict]]) -> float:
         """
         Calculate profit factor
         
         Args:
-            trades: List of trade dictionaries with 'pnl' key
+            trades: TradeLog or list of trade dictionaries with 'pnl' key
             
         Returns:
             Profit factor (gross profit / gross loss)
         """
-        if not trades:
-            return 0.0
-        
-        # Filter out trades with None pnl (open positions)
-        closed_trades = [t for t in trades if t.get('pnl') is not None]
-        if not closed_trades:
-            return 0.0
-        
-        gross_profit = sum(t.get('pnl', 0) for t in closed_trades if t.get('pnl', 0) > 0)
-        gross_loss = abs(sum(t.get('pnl', 0) for t in closed_trades if t.get('pnl', 0) < 0))
-        
-        if gross_loss == 0:
-            # Return a large number instead of inf for JSON compatibility
-            # This represents "perfect" profit factor (no losses)
-            return 999999.0 if gross_profit > 0 else 0.0
-        
-        return gross_profit / gross_loss
+        return BacktestMetrics.calculate_all(trades)['profit_factor']
     
     @staticmethod
-    def calculate_mae_metrics(trades: List[Dict]) -> Dict[str, float]:
+    def calculate_mae_metrics(trades: Union[TradeLog, List[Dict]]) -> Dict[str, float]:
         """
         Calculate Maximum Adverse Excursion (MAE) metrics
         
         Args:
-            trades: List of trade dictionaries with 'max_adverse_excursion' and 'mae_pct' keys
+            trades: TradeLog or list of trade dictionaries with 'max_adverse_excursion' and 'mae_pct' keys
             
         Returns:
             Dictionary with average and maximum MAE metrics
         """
-        if not trades:
-            return {
-                'avg_mae': 0.0,
-                'max_mae': 0.0,
-                'avg_mae_pct': 0.0,
-                'max_mae_pct': 0.0
-            }
-        
-        # Filter out trades without MAE data
-        trades_with_mae = [t for t in trades if 'max_adverse_excursion' in t and t.get('max_adverse_excursion') is not None]
-        if not trades_with_mae:
-            return {
-                'avg_mae': 0.0,
-                'max_mae': 0.0,
-                'avg_mae_pct': 0.0,
-                'max_mae_pct': 0.0
-            }
-        
-        mae_values = [t['max_adverse_excursion'] for t in trades_with_mae]
-        mae_pct_values = [t.get('mae_pct', 0) for t in trades_with_mae]
+        trade_metrics = BacktestMetrics.calculate_all(trades)
+        return {key: trade_metrics[key] for key in ('avg_mae', 'max_mae', 'avg_mae_pct', 'max_mae_pct')}
+    
+    @staticmethod
+    def calculate_all(trades: Union[TradeLog, List[Dict]]) -> Dict[str, float]:
+        """
+        Calculate all trade-level metrics from one pass over the trades
         
-        return {
-            'avg_mae': sum(mae_values) / len(mae_values),
-            'max_mae': min(mae_values),  # Min because MAE is negative
-            'avg_mae_pct': sum(mae_pct_values) / len(mae_pct_values),
-            'max_mae_pct': min(mae_pct_values)  # Min because MAE % is negative
-        }
+        Args:
+            trades: TradeLog, or list of trade dictionaries with 'pnl',
+                'max_adverse_excursion' and 'mae_pct' keys
+            
+        Returns:
+            Dictionary with win_rate, profit_factor, gross_profit, gross_loss, avg_win,
+            avg_loss, avg_mae, max_mae, avg_mae_pct and max_mae_pct
+        """
+        return _trade_metrics(_as_trade_log(trades))
     
     @staticmethod
     def calculate_total_return(equity_curve: pd.Series) -> float:
@@ -157,6 +221,62 @@ class BacktestMetrics:
         
         return ((final - initial) / initial) * 100
     
+    @staticmethod
+    def calculate_equity_metrics(equity_curve: np.ndarray) -> Dict[str, float]:
+        """
+        Calculate Sharpe ratio, max drawdown and total return in one pass over the
+        equity curve
+        
+        Follows the same conventions as calculate_sharpe_ratio, calculate_max_drawdown
+        and calculate_total_return. The equity curve is read as stored (float32 from
+        the backtester) and accumulated in float64.
+        
+        Args:
+            equity_curve: Equity value per bar
+            
+        Returns:
+            Dictionary with sharpe_ratio, max_drawdown and total_return
+        """
+        equity = np.asarray(equity_curve)
+        return_mean, return_std, n_returns, max_drawdown = equity_stats(equity)
+        
+        if n_returns == 0 or return_std == 0:
+            sharpe_ratio = 0.0
+        else:
+            sharpe_ratio = SQRT_365 * return_mean / return_std
+        
+        initial = float(equity[0]) if len(equity) else 0.0
+        if initial == 0:
+            total_return = 0.0
+        else:
+            total_return = ((float(equity[-1]) - initial) / initial) * 100
+        
+        return {
+            'sharpe_ratio': sharpe_ratio,
+            'max_drawdown': max_drawdown * 100,
+            'total_return': total_return,
+        }
+    
+    @staticmethod
+    def calculate_summary(
+        equity: np.ndarray,
+        trades: TradeLog
+    ) -> Dict[str, float]:
+        """
+        Calculate the equity metrics in one pass over the equity curve and all
+        trade-level metrics in one pass over the trade columns
+        
+        Args:
+            equity: Equity value per bar
+            trades: TradeLog with the per-trade pnl, mae and mae_pct columns
+            
+        Returns:
+            Dictionary with the calculate_equity_metrics and calculate_all metrics
+        """
+        summary = BacktestMetrics.calculate_equity_metrics(equity)
+        summary.update(_trade_metrics(trades))
+        return summary
+    
     @staticmethod
     def calculate_optimal_leverage(
         sharpe_ratio: float,
@@ -204,19 +324,19 @@ class BacktestMetrics:
         drawdown_based = min(1.0 / (max_drawdown / 100) * risk_factor, max_leverage)
         
         # Method 3: Use the more conservative of the two, but prioritize drawdown for low-risk strategies
-        # If drawdown is very low (< 5%), drawdown-based is more relevant
-        # If drawdown is higher, sharpe-based becomes the limiting factor
-        if max_drawdown < 5.0:
-            # Low drawdown: use drawdown-based as primary, but cap by sharpe if it's lower
-            optimal_leverage = min(drawdown_based, max(sharpe_based, 1.0), max_leverage)
-            # For recommended, use drawdown-based (scaled down) since it's the relevant constraint
-            recommended = min(max(1.0, drawdown_based * 0.75), max_leverage)
+        # If drawdown is very low (< 5%), drawdown-based is more relevant and sharpe only caps it
+        # (never below 1x); recommended is the drawdown-based leverage scaled down to 75%
+        # If drawdown is higher, sharpe-based becomes the limiting factor; recommended is 75%
+        # of optimal for safety once optimal exceeds 1.5x
+        low_drawdown = max_drawdown < 5.0
+        sharpe_cap = max(sharpe_based, 1.0) if low_drawdown else sharpe_based
+        optimal_leverage = min(drawdown_based, sharpe_cap, max_leverage)
+        if low_drawdown:
+            recommended = min(drawdown_based * 0.75, max_leverage)
         else:
-            # Higher drawdown: use conservative minimum
-            optimal_leverage = min(sharpe_based, drawdown_based, max_leverage)
-            # Recommended: Use fractional leverage (75% of optimal for safety)
-            recommended = max(1.0, optimal_leverage * 0.75) if optimal_leverage > 1.5 else optimal_leverage
+            recommended = optimal_leverage * 0.75 if optimal_leverage > 1.5 else optimal_leverage
         
+        # Every recommendation is floored at 1x (no leverage)
         return {
             'optimal_leverage': round(max(1.0, optimal_leverage), 2),
             'sharpe_based': round(max(1.0, sharpe_based), 2),
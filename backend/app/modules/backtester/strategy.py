@@ -16,6 +16,20 @@ class TradeSignal(Enum):
     HOLD = "hold"
 
 
+# Compact int8 codes for TradeSignal values, mapped back to enums only when asked for
+SIGNAL_CODES = {
+    TradeSignal.HOLD: 0,
+    TradeSignal.LONG_SPREAD: 1,
+    TradeSignal.SHORT_SPREAD: 2,
+    TradeSignal.CLOSE_LONG: 3,
+    TradeSignal.CLOSE_SHORT: 4,
+}
+SIGNAL_UNSET = -1  # No signal written for the bar (NaN in the enum Series)
+
+# Indexed by code; the trailing NaN is what SIGNAL_UNSET (-1) picks up
+_SIGNAL_LOOKUP = np.array(list(SIGNAL_CODES) + [np.nan], dtype=object)
+
+
 class ZScoreStrategy:
     """Z-Score based trading strategy"""
     
@@ -67,8 +81,25 @@ class ZScoreStrategy:
         Returns:
             Series of TradeSignal values
         """
-        signals = pd.Series(index=zscores.index, dtype=object)
+        codes = self.generate_signal_codes(zscores, current_position)
+        # The lookup result is a fresh array, so the Series can own it without a copy
+        return pd.Series(_SIGNAL_LOOKUP[codes], index=zscores.index, copy=False)
+    
+    def generate_signal_codes(
+        self,
+        zscores: pd.Series,
+        current_position: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Generate trading signals based on Z-Score as int8 codes (see SIGNAL_CODES)
         
+        Args:
+            zscores: Series of Z-Score values
+            current_position: Current position ('long' or 'short' or None)
+            
+        Returns:
+            Array of int8 signal codes, one per z-score
+        """
         def calc_zscore_take_profit_target_for_position(take_profit: float, position: str) -> float:
             """
             Convert user-facing take_profit (z-score) into an absolute target z-score level.
@@ -96,38 +127,45 @@ class ZScoreStrategy:
                 return -entry_sign * magnitude
             return entry_sign * magnitude
 
-        for i, zscore in enumerate(zscores):
-            if pd.isna(zscore):
-                signals.iloc[i] = TradeSignal.HOLD
-                continue
-            
-            # Exit logic
-            if current_position == 'long':
-                if self.stop_loss and zscore >= self.stop_loss:
-                    signals.iloc[i] = TradeSignal.CLOSE_LONG
-                elif self.take_profit is not None and self.take_profit_type == 'zscore':
-                    target_z = calc_zscore_take_profit_target_for_position(self.take_profit, 'long')
-                    if zscore >= target_z:
-                        signals.iloc[i] = TradeSignal.CLOSE_LONG
-                else:
-                    signals.iloc[i] = TradeSignal.HOLD
-            elif current_position == 'short':
-                if self.stop_loss and zscore <= -self.stop_loss:
-                    signals.iloc[i] = TradeSignal.CLOSE_SHORT
-                elif self.take_profit is not None and self.take_profit_type == 'zscore':
-                    target_z = calc_zscore_take_profit_target_for_position(self.take_profit, 'short')
-                    if zscore <= target_z:
-                        signals.iloc[i] = TradeSignal.CLOSE_SHORT
-                else:
-                    signals.iloc[i] = TradeSignal.HOLD
+        # All bars share the same position state, so each rule is one boolean mask
+        # over the whole array, computed once
+        values = zscores.to_numpy(dtype=np.float64)
+        nan_mask = np.isnan(values)
+        hold = SIGNAL_CODES[TradeSignal.HOLD]
+        
+        if current_position in ('long', 'short'):
+            # Exit logic; multiplying by the side (+1 long, -1 short) folds the
+            # long (z >= level) and short (z <= level) comparisons into one
+            side = 1.0 if current_position == 'long' else -1.0
+            if self.stop_loss:
+                sl_hit = side * values >= self.stop_loss
+            else:
+                sl_hit = np.zeros(values.shape, dtype=bool)
+            zscore_take_profit = self.take_profit is not None and self.take_profit_type == 'zscore'
+            if zscore_take_profit:
+                target_z = calc_zscore_take_profit_target_for_position(self.take_profit, current_position)
+                tp_hit = side * values >= side * target_z
             else:
-                # Entry logic
-                if zscore <= -self.entry_threshold:
-                    signals.iloc[i] = TradeSignal.LONG_SPREAD
-                elif zscore >= self.entry_threshold:
-                    signals.iloc[i] = TradeSignal.SHORT_SPREAD
-                else:
-                    signals.iloc[i] = TradeSignal.HOLD
+                tp_hit = np.zeros(values.shape, dtype=bool)
+            close_signal = TradeSignal.CLOSE_LONG if current_position == 'long' else TradeSignal.CLOSE_SHORT
+            # Bars short of a z-score take profit level are left unset, as they always have been
+            out = np.where(
+                sl_hit | tp_hit,
+                SIGNAL_CODES[close_signal],
+                SIGNAL_UNSET if zscore_take_profit else hold
+            ).astype(np.int8)
+        else:
+            # Entry logic; LONG_SPREAD is listed first so it wins when a
+            # non-positive threshold makes both conditions true
+            below = values <= -self.entry_threshold
+            above = values >= self.entry_threshold
+            out = np.select(
+                [below, above],
+                [SIGNAL_CODES[TradeSignal.LONG_SPREAD], SIGNAL_CODES[TradeSignal.SHORT_SPREAD]],
+                default=hold
+            ).astype(np.int8)
         
-        return signals
-
+        # Missing z-scores override every other rule
+        out[nan_mask] = hold
+        
+        return out
@@ -5,6 +5,13 @@ Calculates position sizes based on beta (hedge ratio) and capital
 from typing import Dict, Literal
 from enum import Enum
 
+import numpy as np
+
+# Side codes used by the batch API (1 = long, -1 = short)
+SIDE_LONG = 1
+SIDE_SHORT = -1
+SIDE_NAMES = {SIDE_LONG: "long", SIDE_SHORT: "short"}
+
 
 class PositionStrategy(str, Enum):
     """Position sizing strategies"""
@@ -14,6 +21,21 @@ class PositionStrategy(str, Enum):
     LONG_ASSET_B = "long_asset_b"  # Long Asset B, Short Asset A
 
 
+# Sizing rule per strategy: (capital, beta) -> (dollar_a, dollar_b, side_a override or None).
+# Pure arithmetic, so beta may be a float (calculate_position) or an array
+# (calculate_positions_batch, which broadcasts the scalar amounts)
+_STRATEGY_HANDLERS = {
+    # Long $X in one asset, Short $X*beta in the other
+    PositionStrategy.DOLLAR_NEUTRAL: lambda capital, beta: (capital, capital * beta, None),
+    # Split capital equally, then apply beta
+    PositionStrategy.EQUAL_DOLLAR: lambda capital, beta: (capital / 2, (capital / 2) * beta, None),
+    # Always long A, short B
+    PositionStrategy.LONG_ASSET_A: lambda capital, beta: (capital, capital * beta, SIDE_LONG),
+    # Always long B, short A
+    PositionStrategy.LONG_ASSET_B: lambda capital, beta: (capital * beta, capital, SIDE_SHORT),
+}
+
+
 class PositionCalculator:
     """Calculate position sizes for pairs trading"""
     
@@ -67,59 +89,26 @@ class PositionCalculator:
         # Determine direction based on Z-Score
         # Z-Score > 0: spread is high, short spread (short A, long B)
         # Z-Score < 0: spread is low, long spread (long A, short B)
-        if zscore > 0:
-            # Spread is high - short the spread
-            direction_a = "short"
-            direction_b = "long"
-        else:
-            # Spread is low - long the spread
-            direction_a = "long"
-            direction_b = "short"
-        
-        if strategy == PositionStrategy.DOLLAR_NEUTRAL:
-            # Long $X in one asset, Short $X*beta in the other
-            if direction_a == "long":
-                dollar_a = capital
-                dollar_b = capital * beta
-            else:
-                dollar_a = capital
-                dollar_b = capital * beta
-                
-        elif strategy == PositionStrategy.EQUAL_DOLLAR:
-            # Split capital equally, then apply beta
-            dollar_a = capital / 2
-            dollar_b = (capital / 2) * beta
-            
-        elif strategy == PositionStrategy.LONG_ASSET_A:
-            # Always long A, short B
-            dollar_a = capital
-            dollar_b = capital * beta
-            direction_a = "long"
-            direction_b = "short"
-            
-        elif strategy == PositionStrategy.LONG_ASSET_B:
-            # Always long B, short A
-            dollar_a = capital * beta
-            dollar_b = capital
-            direction_a = "short"
-            direction_b = "long"
-        else:
-            raise ValueError(f"Unknown strategy: {strategy}")
+        side_a = SIDE_SHORT if zscore > 0 else SIDE_LONG
         
-        # Calculate quantities
-        quantity_a = dollar_a / asset_a_price
-        quantity_b = dollar_b / asset_b_price
+        # Same sizing rules as the batch API, applied to plain floats
+        handler = _STRATEGY_HANDLERS.get(strategy)
+        if handler is None:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        dollar_a, dollar_b, side_a_override = handler(capital, beta)
+        if side_a_override is not None:
+            side_a = side_a_override
         
         return {
             'asset_a': {
-                'side': direction_a,
-                'quantity': quantity_a,
+                'side': SIDE_NAMES[side_a],
+                'quantity': dollar_a / asset_a_price,
                 'dollar_amount': dollar_a,
                 'price': asset_a_price
             },
             'asset_b': {
-                'side': direction_b,
-                'quantity': quantity_b,
+                'side': SIDE_NAMES[-side_a],
+                'quantity': dollar_b / asset_b_price,
                 'dollar_amount': dollar_b,
                 'price': asset_b_price
             },
@@ -130,6 +119,70 @@ class PositionCalculator:
             'net_exposure': abs(dollar_a - dollar_b)  # Net dollar exposure
         }
     
+    @staticmethod
+    def calculate_positions_batch(
+        capital: float,
+        beta_arr: np.ndarray,
+        price_a_arr: np.ndarray,
+        price_b_arr: np.ndarray,
+        zscore_arr: np.ndarray,
+        strategy: PositionStrategy = PositionStrategy.DOLLAR_NEUTRAL
+    ) -> Dict[str, np.ndarray]:
+        """
+        Calculate position sizes for many pairs at once
+        
+        Same sizing rules as calculate_position, applied element-wise to aligned
+        arrays (one entry per pair) without building per-pair dictionaries.
+        
+        Args:
+            capital: Total capital to invest per pair in USD
+            beta_arr: Hedge ratio (beta) per pair
+            price_a_arr: Current price of asset A per pair
+            price_b_arr: Current price of asset B per pair
+            zscore_arr: Current Z-Score per pair (determines direction)
+            strategy: Position sizing strategy
+            
+        Returns:
+            Dictionary of arrays: side_a / side_b (SIDE_LONG or SIDE_SHORT),
+            quantity_a / quantity_b, dollar_a / dollar_b and net_exposure
+        """
+        beta_arr = np.asarray(beta_arr, dtype=float)
+        price_a_arr = np.asarray(price_a_arr, dtype=float)
+        price_b_arr = np.asarray(price_b_arr, dtype=float)
+        zscore_arr = np.asarray(zscore_arr, dtype=float)
+        
+        if capital <= 0:
+            raise ValueError("Capital must be positive")
+        if np.any(beta_arr <= 0):
+            raise ValueError("Beta must be positive")
+        if np.any(price_a_arr <= 0) or np.any(price_b_arr <= 0):
+            raise ValueError("Asset prices must be positive")
+        
+        # Determine direction based on Z-Score
+        # Z-Score > 0: spread is high, short spread (short A, long B)
+        # Z-Score < 0: spread is low, long spread (long A, short B)
+        side_a = np.where(zscore_arr > 0, SIDE_SHORT, SIDE_LONG).astype(np.int8)
+        
+        handler = _STRATEGY_HANDLERS.get(strategy)
+        if handler is None:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        dollar_a, dollar_b, side_a_override = handler(capital, beta_arr)
+        # Scalar amounts (e.g. the capital itself) become one entry per pair
+        dollar_a = np.broadcast_to(dollar_a, beta_arr.shape).astype(float)
+        dollar_b = np.broadcast_to(dollar_b, beta_arr.shape).astype(float)
+        if side_a_override is not None:
+            side_a = np.full(beta_arr.shape, side_a_override, dtype=np.int8)
+        
+        return {
+            'side_a': side_a,
+            'side_b': -side_a,
+            'quantity_a': dollar_a / price_a_arr,
+            'quantity_b': dollar_b / price_b_arr,
+            'dollar_a': dollar_a,
+            'dollar_b': dollar_b,
+            'net_exposure': np.abs(dollar_a - dollar_b)  # Net dollar exposure
+        }
+    
     @staticmethod
     def calculate_estimated_pnl(
         position: Dict,
@@ -156,24 +209,53 @@ class PositionCalculator:
         asset_a = position['asset_a']
         asset_b = position['asset_b']
         
-        # Calculate P&L for each asset
-        if asset_a['side'] == 'long':
-            pnl_a = asset_a['dollar_amount'] * price_a_change_pct
-        else:
-            pnl_a = -asset_a['dollar_amount'] * price_a_change_pct
+        # Signed exposure per asset: long gains with the price, short loses
+        exposure_a = asset_a['dollar_amount'] if asset_a['side'] == 'long' else -asset_a['dollar_amount']
+        exposure_b = asset_b['dollar_amount'] if asset_b['side'] == 'long' else -asset_b['dollar_amount']
         
-        if asset_b['side'] == 'long':
-            pnl_b = asset_b['dollar_amount'] * price_b_change_pct
-        else:
-            pnl_b = -asset_b['dollar_amount'] * price_b_change_pct
+        pnl_a = exposure_a * price_a_change_pct
+        pnl_b = exposure_b * price_b_change_pct
+        total_pnl = pnl_a + pnl_b
         
+        return {
+            'pnl_a': pnl_a,
+            'pnl_b': pnl_b,
+            'total_pnl': total_pnl,
+            'return_pct': (total_pnl / position['total_capital']) * 100
+        }
+    
+    @staticmethod
+    def calculate_estimated_pnl_batch(
+        position: Dict,
+        price_a_change_pct_arr: np.ndarray,
+        price_b_change_pct_arr: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Calculate estimated P&L for many price change scenarios at once
+        
+        Args:
+            position: Position dictionary from calculate_position
+            price_a_change_pct_arr: Price changes for asset A per scenario (as decimals)
+            price_b_change_pct_arr: Price changes for asset B per scenario (as decimals)
+            
+        Returns:
+            Dictionary of arrays (one entry per scenario): pnl_a, pnl_b, total_pnl
+            and return_pct
+        """
+        asset_a = position['asset_a']
+        asset_b = position['asset_b']
+        
+        # Signed exposure per asset: long gains with the price, short loses
+        exposure_a = asset_a['dollar_amount'] if asset_a['side'] == 'long' else -asset_a['dollar_amount']
+        exposure_b = asset_b['dollar_amount'] if asset_b['side'] == 'long' else -asset_b['dollar_amount']
+        
+        pnl_a = exposure_a * np.asarray(price_a_change_pct_arr, dtype=float)
+        pnl_b = exposure_b * np.asarray(price_b_change_pct_arr, dtype=float)
         total_pnl = pnl_a + pnl_b
-        return_pct = (total_pnl / position['total_capital']) * 100
         
         return {
             'pnl_a': pnl_a,
             'pnl_b': pnl_b,
             'total_pnl': total_pnl,
-            'return_pct': return_pct
+            'return_pct': (total_pnl / position['total_capital']) * 100
         }
-
@@ -25,7 +25,7 @@ class HistoryAnalyzer:
         Returns:
             List of pairs with metric changes
         """
-        # Create lookup dictionaries
+        # Create lookup dictionaries (for duplicate pairs the last result wins)
         current_dict = {
             (r.get('asset_a'), r.get('asset_b')): r
             for r in current_results
@@ -36,41 +36,47 @@ class HistoryAnalyzer:
         }
         
         changes = []
-        all_pairs = set(current_dict.keys()) | set(previous_dict.keys())
-        
-        for pair_key in all_pairs:
-            current = current_dict.get(pair_key)
-            previous = previous_dict.get(pair_key)
-            
-            change_data = {
-                'asset_a': pair_key[0],
-                'asset_b': pair_key[1],
-                'status': 'new' if previous is None else ('removed' if current is None else 'updated')
-            }
+        for (asset_a, asset_b), current in current_dict.items():
+            current_correlation = current.get('correlation', 0)
+            current_beta = current.get('beta', 0)
+            previous = previous_dict.get((asset_a, asset_b))
             
-            if current and previous:
-                # Calculate changes
-                change_data.update({
-                    'correlation_change': current.get('correlation', 0) - previous.get('correlation', 0),
-                    'beta_change': current.get('beta', 0) - previous.get('beta', 0),
-                    'adf_pvalue_change': current.get('adf_pvalue', 0) - previous.get('adf_pvalue', 0),
-                    'current_correlation': current.get('correlation', 0),
-                    'previous_correlation': previous.get('correlation', 0),
-                    'current_beta': current.get('beta', 0),
-                    'previous_beta': previous.get('beta', 0),
-                })
-            elif current:
-                change_data.update({
-                    'current_correlation': current.get('correlation', 0),
-                    'current_beta': current.get('beta', 0),
+            if previous is None:
+                changes.append({
+                    'asset_a': asset_a,
+                    'asset_b': asset_b,
+                    'status': 'new',
+                    'current_correlation': current_correlation,
+                    'current_beta': current_beta,
                 })
-            elif previous:
-                change_data.update({
+                continue
+            
+            # Calculate changes
+            previous_correlation = previous.get('correlation', 0)
+            previous_beta = previous.get('beta', 0)
+            changes.append({
+                'asset_a': asset_a,
+                'asset_b': asset_b,
+                'status': 'updated',
+                'correlation_change': current_correlation - previous_correlation,
+                'beta_change': current_beta - previous_beta,
+                'adf_pvalue_change': current.get('adf_pvalue', 0) - previous.get('adf_pvalue', 0),
+                'current_correlation': current_correlation,
+                'previous_correlation': previous_correlation,
+                'current_beta': current_beta,
+                'previous_beta': previous_beta,
+            })
+        
+        # Pairs that dropped out of the current session
+        for (asset_a, asset_b), previous in previous_dict.items():
+            if (asset_a, asset_b) not in current_dict:
+                changes.append({
+                    'asset_a': asset_a,
+                    'asset_b': asset_b,
+                    'status': 'removed',
                     'previous_correlation': previous.get('correlation', 0),
                     'previous_beta': previous.get('beta', 0),
                 })
-            
-            changes.append(change_data)
         
         return changes
     
@@ -98,39 +104,30 @@ class HistoryAnalyzer:
         # Sort by timestamp
         sorted_history = sorted(results_history, key=lambda x: x.get('timestamp', ''))
         
-        trends = {
-            'total_pairs_trend': [],
-            'avg_correlation_trend': [],
-            'pairs_count_by_time': []
-        }
+        total_pairs_trend = []
+        avg_correlation_trend = []
         
         for entry in sorted_history:
-            results = entry.get('results', [])
-            timestamp = entry.get('timestamp')
+            results = entry.get('results')
             
             if not results:
                 continue
             
-            # Calculate average correlation
-            correlations = [r.get('correlation', 0) for r in results if r.get('correlation')]
+            timestamp = entry.get('timestamp')
+            count = len(results)
+            # Calculate average correlation (only non-zero correlations count)
+            correlations = [correlation for r in results if (correlation := r.get('correlation'))]
             avg_correlation = sum(correlations) / len(correlations) if correlations else 0
             
-            trends['total_pairs_trend'].append({
-                'timestamp': timestamp,
-                'count': len(results)
-            })
-            
-            trends['avg_correlation_trend'].append({
-                'timestamp': timestamp,
-                'avg_correlation': avg_correlation
-            })
-            
-            trends['pairs_count_by_time'].append({
-                'timestamp': timestamp,
-                'count': len(results)
-            })
+            total_pairs_trend.append({'timestamp': timestamp, 'count': count})
+            avg_correlation_trend.append({'timestamp': timestamp, 'avg_correlation': avg_correlation})
         
-        return trends
+        return {
+            'total_pairs_trend': total_pairs_trend,
+            'avg_correlation_trend': avg_correlation_trend,
+            # Same counts as total_pairs_trend, in separate dicts so callers can edit either
+            'pairs_count_by_time': [dict(item) for item in total_pairs_trend]
+        }
     
     @staticmethod
     def detect_degradation(
@@ -150,8 +147,9 @@ class HistoryAnalyzer:
         degraded = []
         
         for result in current_results:
-            pair_key = (result.get('asset_a'), result.get('asset_b'))
-            hist_avg = historical_average.get(pair_key, {})
+            asset_a = result.get('asset_a')
+            asset_b = result.get('asset_b')
+            hist_avg = historical_average.get((asset_a, asset_b))
             
             if not hist_avg:
                 continue
@@ -162,12 +160,11 @@ class HistoryAnalyzer:
             # Consider degraded if correlation dropped significantly
             if current_corr < hist_corr - 0.1:  # 10% drop
                 degraded.append({
-                    'asset_a': result.get('asset_a'),
-                    'asset_b': result.get('asset_b'),
+                    'asset_a': asset_a,
+                    'asset_b': asset_b,
                     'current_correlation': current_corr,
                     'historical_avg_correlation': hist_corr,
                     'degradation': hist_corr - current_corr
                 })
         
         return degraded
-
@@ -1,13 +1,33 @@
 """
 Position manager for tracking open trading positions
 """
-from typing import Dict, List, Optional
-from datetime import datetime
+from typing import Dict, Optional, Tuple
+from datetime import datetime, timedelta
+import itertools
 import threading
+import time
+
+import numpy as np
+
+# Sign applied to the long-spread P&L (long A / short B) per position side
+SIDE_SIGNS = {'long': 1.0, 'short': -1.0}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _utc_from_ns(timestamp_ns: int) -> datetime:
+    """Naive UTC datetime (as datetime.utcnow() gives) for a time.time_ns() timestamp"""
+    return _EPOCH + timedelta(microseconds=timestamp_ns // 1000)
 
 
 class Position:
     """Represents an open trading position"""
+    __slots__ = (
+        'position_id', 'pair_id', 'asset_a', 'asset_b', 'side',
+        'quantity_a', 'quantity_b', 'entry_price_a', 'entry_price_b',
+        'beta', 'entry_zscore', 'created_ns', 'updated_ns', 'side_sign'
+    )
+    
     def __init__(
         self,
         position_id: int,
@@ -27,14 +47,26 @@ class Position:
         self.asset_a = asset_a
         self.asset_b = asset_b
         self.side = side
+        self.side_sign = SIDE_SIGNS.get(side, -1.0)  # +1 long, -1 short
         self.quantity_a = quantity_a
         self.quantity_b = quantity_b
         self.entry_price_a = entry_price_a
         self.entry_price_b = entry_price_b
         self.beta = beta
         self.entry_zscore = entry_zscore
-        self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
+        # Integer timestamps; datetimes are only built when asked for
+        self.created_ns = time.time_ns()
+        self.updated_ns = self.created_ns
+    
+    @property
+    def created_at(self) -> datetime:
+        """Creation time (naive UTC)"""
+        return _utc_from_ns(self.created_ns)
+    
+    @property
+    def updated_at(self) -> datetime:
+        """Last update time (naive UTC)"""
+        return _utc_from_ns(self.updated_ns)
     
     def to_dict(self) -> Dict:
         """Convert position to dictionary"""
@@ -58,10 +90,77 @@ class Position:
 class PositionManager:
     """Manages open trading positions"""
     
+    _INITIAL_CAPACITY = 64
+    _ARRAY_FIELDS = (
+        '_ids', '_pair_ids', '_entry_a', '_entry_b', '_qty_a', '_qty_b', '_side_sign',
+        '_mark_a', '_mark_b', '_cum_pnl_a', '_cum_pnl_b'
+    )
+    
     def __init__(self):
+        # Only writers take the lock; dict lookups and the snapshot tuple below are
+        # read without it (single attribute / dict reads are atomic under the GIL)
         self._positions: Dict[int, Position] = {}
-        self._next_id = 1
+        self._id_counter = itertools.count(1)
         self._lock = threading.Lock()
+        
+        # get_positions() snapshot as (generation, positions), rebuilt lazily after writes
+        self._generation = 0
+        self._snapshot: Tuple[int, Tuple[Position, ...]] = (0, ())
+        
+        # Struct-of-arrays copy of the numeric fields for bulk P&L; row i is the i-th
+        # position of self._positions (insertion order), so position_id is sorted
+        self._size = 0
+        self._ids = np.zeros(self._INITIAL_CAPACITY, dtype=np.int64)
+        self._pair_ids = np.zeros(self._INITIAL_CAPACITY, dtype=np.int64)
+        self._entry_a = np.zeros(self._INITIAL_CAPACITY)
+        self._entry_b = np.zeros(self._INITIAL_CAPACITY)
+        self._qty_a = np.zeros(self._INITIAL_CAPACITY)
+        self._qty_b = np.zeros(self._INITIAL_CAPACITY)
+        self._side_sign = np.zeros(self._INITIAL_CAPACITY)
+        # Running P&L per position and leg, advanced by update_marks from the last
+        # marked prices
+        self._mark_a = np.zeros(self._INITIAL_CAPACITY)
+        self._mark_b = np.zeros(self._INITIAL_CAPACITY)
+        self._cum_pnl_a = np.zeros(self._INITIAL_CAPACITY)
+        self._cum_pnl_b = np.zeros(self._INITIAL_CAPACITY)
+    
+    def _append_row(self, position: Position) -> None:
+        """Append a position to the arrays, doubling their capacity when full (lock held)"""
+        if self._size == len(self._ids):
+            for name in self._ARRAY_FIELDS:
+                old = getattr(self, name)
+                grown = np.zeros(2 * len(old), dtype=old.dtype)
+                grown[:self._size] = old[:self._size]
+                setattr(self, name, grown)
+        
+        row = self._size
+        self._ids[row] = position.position_id
+        self._pair_ids[row] = position.pair_id
+        self._entry_a[row] = position.entry_price_a
+        self._entry_b[row] = position.entry_price_b
+        self._qty_a[row] = position.quantity_a
+        self._qty_b[row] = position.quantity_b
+        self._side_sign[row] = position.side_sign
+        self._mark_a[row] = position.entry_price_a
+        self._mark_b[row] = position.entry_price_b
+        self._cum_pnl_a[row] = 0.0
+        self._cum_pnl_b[row] = 0.0
+        self._size += 1
+    
+    def _row_of(self, position_id: int) -> Optional[int]:
+        """Array row of a position, or None if it is not open (lock held)"""
+        row = int(np.searchsorted(self._ids[:self._size], position_id))
+        if row >= self._size or self._ids[row] != position_id:
+            return None
+        return row
+    
+    def _remove_row(self, position_id: int) -> None:
+        """Remove a position's row, shifting later rows down to keep insertion order (lock held)"""
+        row = self._row_of(position_id)
+        for name in self._ARRAY_FIELDS:
+            column = getattr(self, name)
+            column[row:self._size - 1] = column[row + 1:self._size]
+        self._size -= 1
     
     def create_position(
         self,
@@ -78,9 +177,8 @@ class PositionManager:
     ) -> Position:
         """Create a new position"""
         with self._lock:
-            position_id = self._next_id
-            self._next_id += 1
-            
+            # Drawn under the lock so rows stay in id order (the arrays rely on it)
+            position_id = next(self._id_counter)
             position = Position(
                 position_id=position_id,
                 pair_id=pair_id,
@@ -96,23 +194,32 @@ class PositionManager:
             )
             
             self._positions[position_id] = position
+            self._append_row(position)
+            self._generation += 1
             return position
     
     def get_position(self, position_id: int) -> Optional[Position]:
         """Get position by ID"""
-        with self._lock:
-            return self._positions.get(position_id)
+        return self._positions.get(position_id)
     
-    def get_positions(self) -> List[Position]:
-        """Get all positions"""
+    def get_positions(self) -> Tuple[Position, ...]:
+        """Get all positions (a shared, immutable snapshot)"""
+        generation, positions = self._snapshot
+        if generation == self._generation:
+            return positions
+        
         with self._lock:
-            return list(self._positions.values())
+            if self._snapshot[0] != self._generation:
+                self._snapshot = (self._generation, tuple(self._positions.values()))
+            return self._snapshot[1]
     
     def delete_position(self, position_id: int) -> bool:
         """Delete a position"""
         with self._lock:
             if position_id in self._positions:
                 del self._positions[position_id]
+                self._remove_row(position_id)
+                self._generation += 1
                 return True
             return False
     
@@ -122,17 +229,14 @@ class PositionManager:
         current_price_a: float,
         current_price_b: float
     ) -> Optional[Dict]:
-        """Calculate P&L for a position"""
+        """Calculate P&L for a position (read-only: the running marks of update_marks are untouched)"""
         position = self.get_position(position_id)
         if not position:
             return None
         
-        if position.side == 'long':
-            pnl_a = (current_price_a - position.entry_price_a) * position.quantity_a
-            pnl_b = (position.entry_price_b - current_price_b) * position.quantity_b
-        else:  # short
-            pnl_a = (position.entry_price_a - current_price_a) * position.quantity_a
-            pnl_b = (current_price_b - position.entry_price_b) * position.quantity_b
+        # Long: gain on A, loss on B when it rises; short is the mirror image
+        pnl_a = position.side_sign * (current_price_a - position.entry_price_a) * position.quantity_a
+        pnl_b = -position.side_sign * (current_price_b - position.entry_price_b) * position.quantity_b
         
         total_pnl = pnl_a + pnl_b
         
@@ -145,3 +249,84 @@ class PositionManager:
             'current_price_b': current_price_b
         }
 
+    
+    def calculate_pnl_batch(
+        self,
+        current_prices_a: np.ndarray,
+        current_prices_b: np.ndarray
+    ) -> np.ndarray:
+        """
+        Calculate total P&L of every open position at once
+        
+        Args:
+            current_prices_a: Current price of asset A per position, in get_positions() order
+            current_prices_b: Current price of asset B per position, in get_positions() order
+            
+        Returns:
+            Array of total P&L per position (same order), as calculate_pnl's total_pnl
+        """
+        current_prices_a = np.asarray(current_prices_a, dtype=float)
+        current_prices_b = np.asarray(current_prices_b, dtype=float)
+        
+        with self._lock:
+            n = self._size
+            if len(current_prices_a) != n or len(current_prices_b) != n:
+                raise ValueError(f"Expected {n} prices per asset, one per open position")
+            pnl_a = (current_prices_a - self._entry_a[:n]) * self._qty_a[:n]
+            pnl_b = (current_prices_b - self._entry_b[:n]) * self._qty_b[:n]
+            # Long: gain on A, loss on B when it rises; short is the mirror image
+            return self._side_sign[:n] * (pnl_a - pnl_b)
+    
+    def update_marks(
+        self,
+        prices_a: np.ndarray,
+        prices_b: np.ndarray,
+        ids: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Mark positions to new prices, advancing their running P&L incrementally
+        
+        Each position's P&L moves by the price change since its last mark times its
+        quantities, so a tick costs O(1) per position instead of a recompute from
+        the entry prices.
+        
+        Args:
+            prices_a: New price of asset A per position
+            prices_b: New price of asset B per position
+            ids: Position IDs the prices belong to, each at most once (default: all
+                positions, in get_positions() order)
+            
+        Returns:
+            Running total P&L of the marked positions (same order as the prices)
+            
+        Raises:
+            ValueError: If an ID is unknown or repeated, a price is not finite, or the
+                price counts do not match
+        """
+        prices_a = np.asarray(prices_a, dtype=float)
+        prices_b = np.asarray(prices_b, dtype=float)
+        # A NaN / inf mark would poison the running P&L for good, so nothing is written
+        if not (np.isfinite(prices_a).all() and np.isfinite(prices_b).all()):
+            raise ValueError("Mark prices must be finite")
+        
+        with self._lock:
+            n = self._size
+            if ids is None:
+                rows = np.arange(n)
+            else:
+                ids = np.asarray(ids, dtype=np.int64)
+                rows = np.searchsorted(self._ids[:n], ids)
+                if np.any(rows >= n) or np.any(self._ids[np.minimum(rows, n - 1)] != ids):
+                    raise ValueError("Unknown position ID in marks")
+                # A repeated row would only keep one of its updates
+                if len(np.unique(rows)) != len(rows):
+                    raise ValueError("Duplicate position ID in marks")
+            if len(prices_a) != len(rows) or len(prices_b) != len(rows):
+                raise ValueError(f"Expected {len(rows)} prices per asset, one per marked position")
+            
+            side_sign = self._side_sign[rows]
+            self._cum_pnl_a[rows] += side_sign * (prices_a - self._mark_a[rows]) * self._qty_a[rows]
+            self._cum_pnl_b[rows] -= side_sign * (prices_b - self._mark_b[rows]) * self._qty_b[rows]
+            self._mark_a[rows] = prices_a
+            self._mark_b[rows] = prices_b
+            return self._cum_pnl_a[rows] + self._cum_pnl_b[rows]
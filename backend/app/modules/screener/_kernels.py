@@ -0,0 +1,303 @@
+"""
+Compiled kernels for the screener hot paths
+
+Every per-series kernel releases the GIL (nogil=True), so the pair-testing
+threads run them concurrently instead of taking turns.
+"""
+from functools import lru_cache
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True, nogil=True)
+def ols_fit(y, x):
+    """
+    Closed-form OLS fit of y = alpha + beta * x from centered sums
+
+    Args:
+        y: Dependent values (price A)
+        x: Regressor values (price B), aligned with y and free of NaN
+
+    Returns:
+        Tuple of (alpha, beta); beta is NaN if x is constant
+    """
+    n = len(x)
+    x_mean = 0.0
+    y_mean = 0.0
+    for i in range(n):
+        x_mean += x[i]
+        y_mean += y[i]
+    x_mean /= n
+    y_mean /= n
+
+    sxx = 0.0
+    sxy = 0.0
+    for i in range(n):
+        dx = x[i] - x_mean
+        sxx += dx * dx
+        sxy += dx * (y[i] - y_mean)
+    beta = sxy / sxx if sxx > 0 else np.nan
+    return y_mean - beta * x_mean, beta
+
+
+@njit(cache=True, nogil=True)
+def engle_granger_residuals(price_a, price_b):
+    """
+    Hedge regression, residuals and residual std of the Engle-Granger first step
+
+    One pass for the means, one for the centered cross-products and one that
+    writes the residuals and accumulates their sample std (the residual mean is
+    taken from the same pass, so no separate reduction is needed).
+
+    Args:
+        price_a: Prices of asset A (dependent variable), free of NaN
+        price_b: Prices of asset B (regressor), aligned with price_a
+
+    Returns:
+        Tuple of (alpha, beta, residuals, residual_std); beta is NaN if price_b
+        is constant
+    """
+    n = len(price_a)
+    alpha, beta = ols_fit(price_a, price_b)
+
+    residuals = np.empty(n)
+    # Welford update of the residual mean / variance while writing the residuals
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        r = price_a[i] - (alpha + beta * price_b[i])
+        residuals[i] = r
+        delta = r - mean
+        mean += delta / (i + 1)
+        m2 += delta * (r - mean)
+    residual_std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+    return alpha, beta, residuals, residual_std
+
+
+@njit(cache=True, nogil=True, error_model='numpy')
+def rolling_corr(a, b, window):
+    """
+    Rolling Pearson correlation over every full window in one sliding pass
+
+    Window sums of a, b, a^2, b^2 and a*b are updated by adding the new element
+    and dropping the one leaving the window, so each window costs O(1).
+
+    Args:
+        a: First NaN-free array (ideally shifted by its mean to limit cancellation)
+        b: Second NaN-free array, aligned with a
+        window: Window length (1 <= window <= len(a))
+
+    Returns:
+        Array of len(a) - window + 1 correlations; NaN where either side is constant
+        over the window
+    """
+    n = len(a)
+    out = np.empty(n - window + 1)
+    sum_a = 0.0
+    sum_b = 0.0
+    sum_aa = 0.0
+    sum_bb = 0.0
+    sum_ab = 0.0
+    for i in range(n):
+        sum_a += a[i]
+        sum_b += b[i]
+        sum_aa += a[i] * a[i]
+        sum_bb += b[i] * b[i]
+        sum_ab += a[i] * b[i]
+        if i >= window:
+            j = i - window
+            sum_a -= a[j]
+            sum_b -= b[j]
+            sum_aa -= a[j] * a[j]
+            sum_bb -= b[j] * b[j]
+            sum_ab -= a[j] * b[j]
+        if i >= window - 1:
+            cov = sum_ab - sum_a * sum_b / window
+            var_a = max(sum_aa - sum_a * sum_a / window, 0.0)
+            var_b = max(sum_bb - sum_b * sum_b / window, 0.0)
+            if var_a == 0.0 or var_b == 0.0:
+                out[i - window + 1] = np.nan
+            else:
+                out[i - window + 1] = min(max(cov / np.sqrt(var_a * var_b), -1.0), 1.0)
+    return out
+
+
+@njit(cache=True, nogil=True)
+def pair_stats(a, b):
+    """
+    Price correlation, hedge regression and residual std of a pair in a single pass
+
+    Accumulates the sums of a, b, a^2, b^2 and a*b in one loop and derives every
+    statistic from them. The sums are taken around the first observation of each
+    series, which keeps them small and avoids most of the cancellation of raw
+    power sums.
+
+    Args:
+        a: Prices of asset A (dependent variable), free of NaN
+        b: Prices of asset B (regressor), aligned with a
+
+    Returns:
+        Tuple of (correlation, beta, alpha, residual_std, mean_a, n); beta and
+        correlation are NaN if b is constant
+    """
+    n = len(a)
+    shift_a = a[0]
+    shift_b = b[0]
+    sum_a = 0.0
+    sum_b = 0.0
+    sum_aa = 0.0
+    sum_bb = 0.0
+    sum_ab = 0.0
+    for i in range(n):
+        da = a[i] - shift_a
+        db = b[i] - shift_b
+        sum_a += da
+        sum_b += db
+        sum_aa += da * da
+        sum_bb += db * db
+        sum_ab += da * db
+
+    sxx = max(sum_bb - sum_b * sum_b / n, 0.0)
+    syy = max(sum_aa - sum_a * sum_a / n, 0.0)
+    sxy = sum_ab - sum_a * sum_b / n
+    mean_a = shift_a + sum_a / n
+    mean_b = shift_b + sum_b / n
+
+    if sxx > 0:
+        beta = sxy / sxx
+        correlation = sxy / np.sqrt(sxx * syy) if syy > 0 else np.nan
+        # Residual sum of squares of the OLS fit: Syy - beta * Sxy
+        residual_std = np.sqrt(max(syy - beta * sxy, 0.0) / (n - 1))
+    else:
+        beta = np.nan
+        correlation = np.nan
+        residual_std = np.nan
+    alpha = mean_a - beta * mean_b
+    return correlation, beta, alpha, residual_std, mean_a, n
+
+
+@njit(cache=True, nogil=True)
+def ghe_k_values(increments, n_tau, q):
+    """
+    K_q(tau) ratios of the generalized Hurst exponent for tau = 1..n_tau
+
+    Each lag's mean of |inc[i + tau] - inc[i]|^q is accumulated in one loop
+    without temporaries; q == 1 skips the power.
+
+    Args:
+        increments: First differences of the series, free of NaN
+        n_tau: Number of lags (each shorter than len(increments))
+        q: Moment order
+
+    Returns:
+        Array of K_q(tau) values (all NaN if the increments are all zero)
+    """
+    n = len(increments)
+    k_values = np.empty(n_tau)
+
+    denominator = 0.0
+    if q == 1.0:
+        for i in range(n):
+            denominator += abs(increments[i])
+    else:
+        for i in range(n):
+            denominator += abs(increments[i]) ** q
+    denominator /= n
+    if denominator == 0.0:
+        k_values[:] = np.nan
+        return k_values
+
+    for t in range(n_tau):
+        tau = t + 1
+        numerator = 0.0
+        if q == 1.0:
+            for i in range(n - tau):
+                numerator += abs(increments[i + tau] - increments[i])
+        else:
+            for i in range(n - tau):
+                numerator += abs(increments[i + tau] - increments[i]) ** q
+        k_values[t] = numerator / (n - tau) / denominator
+    return k_values
+
+
+@njit(parallel=True, cache=True)
+def ghe_k_values_batch(increments, n_tau, q):
+    """
+    ghe_k_values for every row of an increment matrix, with the rows spread over cores
+
+    Rows are independent, so each one is a single prange iteration writing its own
+    row of the output (set NUMBA_NUM_THREADS to cap the threads).
+
+    Args:
+        increments: First differences of each series (n_series x n), free of NaN
+        n_tau: Number of lags (each shorter than n)
+        q: Moment order
+
+    Returns:
+        Matrix of K_q(tau) values (n_series x n_tau), NaN rows for all-zero increments
+    """
+    n_series = increments.shape[0]
+    k_values = np.empty((n_series, n_tau))
+    for row in prange(n_series):
+        k_values[row] = ghe_k_values(increments[row], n_tau, q)
+    return k_values
+
+
+@njit(cache=True, nogil=True)
+def spread_summary(spread):
+    """
+    Mean, sample std and z-score of the last value of a spread, without temporaries
+
+    A single pass with Welford's update of the running mean and sum of squared
+    deviations, which stays as accurate as the two-pass mean() / std(ddof=1)
+    without reading the spread twice; NaN values are skipped.
+
+    Args:
+        spread: Spread values
+
+    Returns:
+        Tuple of (mean, std, last_zscore); mean is NaN for an all-NaN spread, std is
+        NaN with fewer than 2 values, last_zscore is 0.0 for no values or zero std
+    """
+    count = 0
+    mean = 0.0
+    squares = 0.0
+    last = np.nan
+    for i in range(len(spread)):
+        value = spread[i]
+        if not np.isnan(value):
+            count += 1
+            delta = value - mean
+            mean += delta / count
+            squares += delta * (value - mean)
+            last = value
+    if count == 0:
+        return np.nan, np.nan, 0.0
+    if count < 2:
+        return mean, np.nan, np.nan
+
+    std = np.sqrt(squares / (count - 1))
+    if std == 0:
+        return mean, std, 0.0
+    return mean, std, (last - mean) / std
+
+
+@lru_cache(maxsize=1)
+def warm_up_kernels():
+    """
+    Compile (or load from the on-disk cache) every kernel once, on the calling thread
+
+    Called before the screener starts its worker threads, so the workers do not
+    race for the first-call compilation and wait on numba's dispatcher lock.
+    Inputs use the float64 / int64 signatures the screener calls the kernels with.
+    """
+    a = np.linspace(1.0, 2.0, 64)
+    b = np.sqrt(a)
+    ols_fit(a, b)
+    engle_granger_residuals(a, b)
+    rolling_corr(a, b, 8)
+    pair_stats(a, b)
+    ghe_k_values(np.diff(b), 5, 1.0)
+    ghe_k_values_batch(np.diff(np.vstack((a, b)), axis=1), 5, 1.0)
+    spread_summary(a)
@@ -1,11 +1,132 @@
 """
 Cointegration testing using Engle-Granger method
 """
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 from statsmodels.tsa.stattools import adfuller
-from statsmodels.regression.linear_model import OLS
-from typing import Tuple, Optional
+from statsmodels.tsa.adfvalues import mackinnonp
+from typing import List, Tuple, Optional, Union
+
+from ._kernels import engle_granger_residuals, ols_fit, pair_stats, spread_summary
+from .correlation import align_prices
+
+
+def ols_alpha_beta(y: np.ndarray, x: np.ndarray) -> Tuple[float, float]:
+    """
+    Closed-form OLS fit of y = alpha + beta * x
+    
+    Same estimate as statsmodels OLS with a constant, from the centered
+    cross-product and sum of squares, without building a results object.
+    
+    Args:
+        y: Dependent values (price A)
+        x: Regressor values (price B), aligned with y and free of NaN
+        
+    Returns:
+        Tuple of (alpha, beta); beta is NaN if x is constant
+    """
+    alpha, beta = ols_fit(np.asarray(y, dtype=np.float64), np.asarray(x, dtype=np.float64))
+    return float(alpha), float(beta)
+
+
+# Screening cascade: a fixed-lag ADF regression is solved first, and the full
+# AIC lag search of adfuller only runs when its p-value is not clearly hopeless
+FAST_ADF_LAG = 1
+FAST_ADF_SKIP_PVALUE = 0.5
+
+
+@lru_cache(maxsize=1)
+def _mackinnon_grid() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    MacKinnon p-values (regression='c', N=1) on a grid of test statistics, built once
+    
+    Returns:
+        Tuple of (test statistics, p-values) for np.interp; within ~1e-3 of mackinnonp
+    """
+    grid_stats = np.arange(-20.0, 5.0 + 1e-9, 0.01)
+    grid_pvalues = np.array([mackinnonp(stat, regression='c', N=1) for stat in grid_stats])
+    return grid_stats, grid_pvalues
+
+
+def _fast_adf_batch(residuals: np.ndarray, lag: int = FAST_ADF_LAG) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ADF test with a fixed lag order for many residual series at once
+    
+    Regresses diff(resid)_t on [resid_{t-1}, diff(resid)_{t-1..t-lag}, const] (the
+    design adfuller uses for one lag order with regression='c') for every row, via
+    batched normal equations.
+    
+    Args:
+        residuals: Residual matrix (N_series x T), free of NaN
+        lag: Number of lagged differences
+        
+    Returns:
+        Tuple of (adf_statistic, approximate p-value) arrays of length N_series;
+        NaN if the regressions cannot be solved
+    """
+    residuals = np.atleast_2d(np.asarray(residuals, dtype=float))
+    n_series, n_points = residuals.shape
+    diff = np.diff(residuals, axis=1)
+    n_obs = n_points - 1 - lag
+    n_params = lag + 2
+    
+    design = np.empty((n_series, n_obs, n_params))
+    design[:, :, 0] = residuals[:, lag:-1]
+    for i in range(1, lag + 1):
+        design[:, :, i] = diff[:, lag - i:n_points - 1 - i]
+    design[:, :, -1] = 1.0
+    target = diff[:, lag:]
+    
+    try:
+        gram_inv = np.linalg.inv(np.einsum('nik,nil->nkl', design, design))
+    except np.linalg.LinAlgError:
+        nan = np.full(n_series, np.nan)
+        return nan, nan.copy()
+    coef = np.einsum('nkl,nl->nk', gram_inv, np.einsum('nik,ni->nk', design, target))
+    fitted_resid = target - np.einsum('nik,nk->ni', design, coef)
+    sigma2 = np.einsum('ni,ni->n', fitted_resid, fitted_resid) / (n_obs - n_params)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        adf_statistic = coef[:, 0] / np.sqrt(sigma2 * gram_inv[:, 0, 0])
+    
+    grid_stats, grid_pvalues = _mackinnon_grid()
+    adf_pvalue = np.interp(adf_statistic, grid_stats, grid_pvalues, left=0.0, right=1.0)
+    adf_pvalue[np.isnan(adf_statistic)] = np.nan
+    return adf_statistic, adf_pvalue
+
+
+def _fast_adf(resid: np.ndarray, lag: int = FAST_ADF_LAG) -> Tuple[float, float]:
+    """
+    ADF test with a fixed lag order for a single residual series (see _fast_adf_batch)
+    
+    Args:
+        resid: Residual series (spread), free of NaN
+        lag: Number of lagged differences
+        
+    Returns:
+        Tuple of (adf_statistic, approximate p-value from the MacKinnon response surface)
+    """
+    adf_statistic, adf_pvalue = _fast_adf_batch(resid, lag)
+    return float(adf_statistic[0]), float(adf_pvalue[0])
+
+
+def _cascade_adf(resid: np.ndarray) -> Tuple[float, float]:
+    """
+    ADF statistic and p-value of a residual series, screened with _fast_adf first
+    
+    Args:
+        resid: Residual series (spread), free of NaN
+        
+    Returns:
+        Tuple of (adf_statistic, adf_pvalue); the fixed-lag result if it is far from
+        significant, otherwise the adfuller (autolag='AIC') result
+    """
+    adf_statistic, adf_pvalue = _fast_adf(resid)
+    if adf_pvalue > FAST_ADF_SKIP_PVALUE:
+        return adf_statistic, adf_pvalue
+    
+    adf_result = adfuller(resid, autolag='AIC')
+    return adf_result[0], adf_result[1]
 
 
 class CointegrationTester:
@@ -13,52 +134,46 @@ class CointegrationTester:
     
     @staticmethod
     def engle_granger_test(
-        price_a: pd.Series,
-        price_b: pd.Series
-    ) -> Tuple[bool, float, float, float, float]:
+        price_a: Union[pd.Series, np.ndarray],
+        price_b: Union[pd.Series, np.ndarray]
+    ) -> Tuple[bool, float, float, float, float, float]:
         """
         Perform Engle-Granger cointegration test
         
         Args:
-            price_a: Price series for asset A
-            price_b: Price series for asset B
+            price_a: Price series for asset A (Series, or array aligned with price_b)
+            price_b: Price series for asset B (Series, or array aligned with price_a)
             
         Returns:
-            Tuple of (is_cointegrated, beta, adf_statistic, adf_pvalue, spread_std)
+            Tuple of (is_cointegrated, beta, alpha, adf_statistic, adf_pvalue, spread_std)
             is_cointegrated: True if p-value < 0.10
             beta: Hedge ratio from OLS regression
+            alpha: Intercept from the same OLS regression
             adf_statistic: ADF test statistic
             adf_pvalue: ADF test p-value
             spread_std: Standard deviation of spread residuals
         """
         # Align series (remove NaN values)
-        aligned = pd.DataFrame({'a': price_a, 'b': price_b}).dropna()
-        
-        if len(aligned) < 50:  # Need minimum data points
-            return False, 0.0, 0.0, 1.0, 0.0
-        
-        price_a_aligned = aligned['a']
-        price_b_aligned = aligned['b']
+        price_a_aligned, price_b_aligned = align_prices(price_a, price_b)
         
-        # Step 1: OLS regression: Price_A = alpha + beta * Price_B + epsilon
-        X = price_b_aligned.values.reshape(-1, 1)
-        y = price_a_aligned.values
-        
-        # Add constant term
-        X_with_const = np.column_stack([np.ones(len(X)), X])
+        if len(price_a_aligned) < 50:  # Need minimum data points
+            return False, 0.0, 0.0, 0.0, 1.0, 0.0
         
         try:
-            model = OLS(y, X_with_const).fit()
-            alpha = model.params[0]
-            beta = model.params[1]
-            
-            # Step 2: Calculate residuals (spread)
-            residuals = price_a_aligned - (alpha + beta * price_b_aligned)
+            # Step 1: OLS regression: Price_A = alpha + beta * Price_B + epsilon
+            # Step 2: Calculate residuals (spread) and their std in the same compiled pass
+            alpha, beta, residuals, spread_std_absolute = engle_granger_residuals(
+                price_a_aligned, price_b_aligned
+            )
+            if np.isnan(beta):
+                # Constant Price_B: no hedge ratio to estimate
+                return False, 0.0, 0.0, 0.0, 1.0, 0.0
+            beta = float(beta)
+            alpha = float(alpha)
             
             # Normalize spread_std to avoid issues with different price scales
             # Use percentage of average price A to make it comparable across pairs
             avg_price_a = price_a_aligned.mean()
-            spread_std_absolute = residuals.std()
             
             # Normalized spread_std as percentage (more comparable across different price levels)
             if avg_price_a > 0:
@@ -67,18 +182,148 @@ class CointegrationTester:
                 spread_std = spread_std_absolute
             
             # Step 3: ADF test on residuals
-            adf_result = adfuller(residuals.dropna(), autolag='AIC')
-            adf_statistic = adf_result[0]
-            adf_pvalue = adf_result[1]
+            adf_statistic, adf_pvalue = _cascade_adf(residuals)
             
             # Cointegrated if p-value < 0.10
             is_cointegrated = adf_pvalue < 0.10
             
-            return is_cointegrated, beta, adf_statistic, adf_pvalue, spread_std
+            return is_cointegrated, beta, alpha, adf_statistic, adf_pvalue, spread_std
+            
+        except Exception as e:
+            print(f"Error in cointegration test: {e}")
+            return False, 0.0, 0.0, 0.0, 1.0, 0.0
+    
+    @staticmethod
+    def engle_granger_fused(
+        price_a: np.ndarray,
+        price_b: np.ndarray
+    ) -> Optional[Tuple[bool, float, float, float, float, float, np.ndarray]]:
+        """
+        Engle-Granger test of an aligned pair with the regression fused into one pass
+        
+        The hedge regression, intercept and residual std come from a single compiled
+        pass over the prices (pair_stats); the residuals are then formed once and
+        serve both as the ADF input and as the returned spread, so callers need no
+        separate intercept refit or spread calculation.
+        
+        Args:
+            price_a: Prices of asset A, NaN-free and aligned with price_b
+            price_b: Prices of asset B, NaN-free and aligned with price_a
             
+        Returns:
+            Tuple of (is_cointegrated, beta, alpha, adf_statistic, adf_pvalue, spread_std,
+            spread), or None if the pair cannot be tested (fewer than 50 points,
+            constant prices or a degenerate residual series)
+        """
+        price_a = np.asarray(price_a, dtype=np.float64)
+        price_b = np.asarray(price_b, dtype=np.float64)
+        if len(price_a) < 50:  # Need minimum data points
+            return None
+        
+        _, beta, alpha, spread_std_absolute, avg_price_a, _ = pair_stats(price_a, price_b)
+        # Gates: a hedge ratio must exist and the residuals must vary
+        if np.isnan(beta) or not spread_std_absolute > 0:
+            return None
+        
+        spread = price_a - (alpha + beta * price_b)
+        try:
+            adf_statistic, adf_pvalue = _cascade_adf(spread)
         except Exception as e:
             print(f"Error in cointegration test: {e}")
-            return False, 0.0, 0.0, 1.0, 0.0
+            return None
+        
+        # Normalized spread_std as percentage of average price A (as in engle_granger_test)
+        if avg_price_a > 0:
+            spread_std = (spread_std_absolute / avg_price_a) * 100
+        else:
+            spread_std = spread_std_absolute
+        
+        # Cointegrated if p-value < 0.10
+        return adf_pvalue < 0.10, float(beta), float(alpha), adf_statistic, adf_pvalue, spread_std, spread
+    
+    @staticmethod
+    def engle_granger_rows(
+        price_rows: np.ndarray,
+        rows_a: np.ndarray,
+        rows_b: np.ndarray,
+        chunk_size: int = 1024
+    ) -> List[Optional[Tuple[bool, float, float, float, float, float, np.ndarray]]]:
+        """
+        engle_granger_fused for many pairs of rows of one aligned price matrix
+        
+        Hedge regressions and spreads of a chunk of pairs come from vectorized row
+        means and cross-products, and the fixed-lag ADF of all their spreads is one
+        _fast_adf_batch call; adfuller (AIC lag search) only runs for the spreads it
+        does not rule out, as in _cascade_adf.
+        
+        Args:
+            price_rows: Price matrix (K x T), one row per asset, aligned and free of NaN
+            rows_a: Row of asset A (dependent variable) per pair
+            rows_b: Row of asset B (regressor) per pair
+            chunk_size: Pairs handled per vectorized step (bounds the temporaries)
+            
+        Returns:
+            engle_granger_fused result of each pair, in order (None if the pair cannot
+            be tested)
+        """
+        price_rows = np.asarray(price_rows, dtype=np.float64)
+        rows_a = np.asarray(rows_a, dtype=np.intp)
+        rows_b = np.asarray(rows_b, dtype=np.intp)
+        n_points = price_rows.shape[1]
+        outcomes: List[Optional[Tuple[bool, float, float, float, float, float, np.ndarray]]] = [None] * len(rows_a)
+        if n_points < 50:  # Need minimum data points
+            return outcomes
+        
+        means = price_rows.mean(axis=1)
+        centered = price_rows - means[:, None]
+        sum_squares = np.einsum('ij,ij->i', centered, centered)
+        
+        for start in range(0, len(rows_a), chunk_size):
+            chunk_a = rows_a[start:start + chunk_size]
+            chunk_b = rows_b[start:start + chunk_size]
+            
+            # Step 1: OLS of every A row on its B row from the centered cross-products
+            sxy = np.einsum('ij,ij->i', centered[chunk_a], centered[chunk_b])
+            sxx = sum_squares[chunk_b]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                beta = np.where(sxx > 0, sxy / sxx, np.nan)
+                spread_std_absolute = np.sqrt(np.maximum(sum_squares[chunk_a] - beta * sxy, 0.0) / (n_points - 1))
+            alpha = means[chunk_a] - beta * means[chunk_b]
+            # Gates: a hedge ratio must exist and the residuals must vary
+            testable = np.flatnonzero(~np.isnan(beta) & (spread_std_absolute > 0))
+            if len(testable) == 0:
+                continue
+            
+            # Step 2: spreads and their fixed-lag ADF in one batch
+            spreads = price_rows[chunk_a[testable]] - (
+                alpha[testable, None] + beta[testable, None] * price_rows[chunk_b[testable]]
+            )
+            fast_statistic, fast_pvalue = _fast_adf_batch(spreads)
+            
+            for k, spread, stat, pvalue in zip(testable.tolist(), spreads, fast_statistic, fast_pvalue):
+                if pvalue > FAST_ADF_SKIP_PVALUE:
+                    adf_statistic, adf_pvalue = float(stat), float(pvalue)
+                else:
+                    try:
+                        adf_result = adfuller(spread, autolag='AIC')
+                    except Exception as e:
+                        print(f"Error in cointegration test: {e}")
+                        continue
+                    adf_statistic, adf_pvalue = adf_result[0], adf_result[1]
+                
+                # Normalized spread_std as percentage of average price A (as in engle_granger_test)
+                mean_a = means[chunk_a[k]]
+                spread_std = spread_std_absolute[k]
+                if mean_a > 0:
+                    spread_std = (spread_std / mean_a) * 100
+                
+                # Cointegrated if p-value < 0.10
+                outcomes[start + k] = (
+                    adf_pvalue < 0.10, float(beta[k]), float(alpha[k]),
+                    adf_statistic, adf_pvalue, float(spread_std), spread.copy()
+                )
+        
+        return outcomes
     
     @staticmethod
     def calculate_spread(
@@ -104,26 +349,53 @@ class CointegrationTester:
         return spread
     
     @staticmethod
-    def calculate_zscore(spread: pd.Series) -> pd.Series:
+    def calculate_zscore(
+        spread: pd.Series,
+        as_numpy: bool = False
+    ) -> Union[pd.Series, np.ndarray]:
         """
         Calculate z-score of spread (normalized spread)
         
         Args:
             spread: Spread series
+            as_numpy: Return a plain array of the values instead of an indexed Series
+                (for callers that only use the numbers)
         
         Returns:
             Z-score series: (spread - mean) / std
         """
         spread_clean = spread.dropna()
         if len(spread_clean) == 0:
-            return pd.Series(dtype=float)
+            return np.empty(0) if as_numpy else pd.Series(dtype=float)
         
         mean_spread = spread_clean.mean()
         std_spread = spread_clean.std()
         
         if std_spread == 0:
+            if as_numpy:
+                return np.zeros(len(spread_clean))
             return pd.Series(0, index=spread_clean.index)
         
+        if as_numpy:
+            return (spread_clean.to_numpy(dtype=float) - mean_spread) / std_spread
         zscore = (spread_clean - mean_spread) / std_spread
         return zscore
 
+    
+    @staticmethod
+    def current_zscore_fast(spread: np.ndarray) -> Tuple[float, float]:
+        """
+        Mean of a spread and z-score of its latest value, in one compiled kernel
+        
+        Same values as spread.mean() and calculate_zscore(spread, as_numpy=True)[-1]
+        (NaN skipped), without building the cleaned copy or the full z-score array.
+        
+        Args:
+            spread: Spread values
+        
+        Returns:
+            Tuple of (mean_spread, current_zscore); current_zscore is 0.0 for an
+            empty spread
+        """
+        mean_spread, _, current_zscore = spread_summary(np.asarray(spread, dtype=np.float64))
+        return float(mean_spread), float(current_zscore)
@@ -1,10 +1,120 @@
 """
 Correlation analysis for pairs
 """
+from dataclasses import dataclass
 import pandas as pd
 import numpy as np
-from typing import Tuple, Optional
-import warnings
+from typing import Tuple, Optional, Union
+
+from ._kernels import rolling_corr
+
+
+def align_prices(
+    price_a: Union[pd.Series, np.ndarray],
+    price_b: Union[pd.Series, np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Align two price series and drop the rows where either is NaN
+    
+    Series on different indexes are joined on their dates (as the previous
+    DataFrame(...).dropna() construction did); everything else is aligned by
+    position with a plain NaN mask, so already aligned arrays pass through cheaply.
+    
+    Args:
+        price_a: Prices of asset A
+        price_b: Prices of asset B
+        
+    Returns:
+        Tuple of float arrays (price_a, price_b) of equal length, free of NaN
+    """
+    if (
+        isinstance(price_a, pd.Series)
+        and isinstance(price_b, pd.Series)
+        and not price_a.index.equals(price_b.index)
+    ):
+        aligned = pd.DataFrame({'a': price_a, 'b': price_b}).dropna()
+        return aligned['a'].to_numpy(dtype=float), aligned['b'].to_numpy(dtype=float)
+    
+    price_a = np.asarray(price_a, dtype=float)
+    price_b = np.asarray(price_b, dtype=float)
+    mask = ~(np.isnan(price_a) | np.isnan(price_b))
+    return price_a[mask], price_b[mask]
+
+
+def _simple_returns(prices: np.ndarray) -> np.ndarray:
+    """Bar-over-bar simple returns (pct_change without the leading NaN); NaN prices propagate"""
+    return prices[1:] / prices[:-1] - 1.0
+
+
+def _pearson(x: np.ndarray, y: np.ndarray, std_x: float, std_y: float) -> float:
+    """Pearson correlation of two NaN-free arrays from their (already known) sample stds"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = np.dot(x - x.mean(), y - y.mean()) / ((len(x) - 1) * std_x * std_y)
+    return float(np.clip(corr, -1.0, 1.0))
+
+
+def rolling_corr_fast(a: np.ndarray, b: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling Pearson correlation over every full window in O(T)
+    
+    The window moments are maintained by a compiled sliding-sum loop (see
+    _kernels.rolling_corr), so each window's mean / variance / covariance is
+    an O(1) update instead of a re-sum. Both inputs are shifted by their
+    overall mean first (correlation is unchanged) to keep the squared sums
+    small and limit cancellation.
+    
+    Args:
+        a: First NaN-free array
+        b: Second NaN-free array, aligned with a
+        window: Window length
+        
+    Returns:
+        Array of len(a) - window + 1 correlations (window ending at each position
+        from window - 1 on); NaN where either side is constant over the window
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if window < 1 or window > len(a):
+        return np.empty(0)
+    
+    return rolling_corr(a - a.mean(), b - b.mean(), window)
+
+
+@dataclass
+class AssetStatsCache:
+    """
+    Per-asset prices and return statistics, computed once and shared by every pair
+    
+    Entries are only comparable with each other when they were built from prices on
+    the same dates (e.g. assets covering the full screened date index).
+    
+    Attributes:
+        prices: NaN-free prices
+        returns: Simple returns of prices
+        mean: Mean of returns
+        std: Sample standard deviation of returns (NaN with fewer than 2 returns)
+    """
+    prices: np.ndarray
+    returns: np.ndarray
+    mean: float
+    std: float
+    
+    @classmethod
+    def from_prices(cls, prices: Union[pd.Series, np.ndarray]) -> 'AssetStatsCache':
+        """
+        Compute the cached statistics of one asset
+        
+        Args:
+            prices: Prices of the asset, free of NaN
+            
+        Returns:
+            AssetStatsCache for the asset
+        """
+        prices = np.asarray(prices, dtype=float)
+        returns = _simple_returns(prices)
+        std = float(returns.std(ddof=1)) if len(returns) > 1 else np.nan
+        mean = float(returns.mean()) if len(returns) > 0 else np.nan
+        return cls(prices=prices, returns=returns, mean=mean, std=std)
 
 
 class CorrelationAnalyzer:
@@ -12,40 +122,42 @@ class CorrelationAnalyzer:
     
     @staticmethod
     def calculate_correlation(
-        price_a: pd.Series,
-        price_b: pd.Series,
+        price_a: Union[pd.Series, np.ndarray],
+        price_b: Union[pd.Series, np.ndarray],
         window: Optional[int] = None
     ) -> Tuple[float, float, float]:
         """
         Calculate Pearson correlation between two price series
         
         Args:
-            price_a: Price series for asset A
-            price_b: Price series for asset B
+            price_a: Price series for asset A (Series, or array aligned with price_b)
+            price_b: Price series for asset B (Series, or array aligned with price_a)
             window: Rolling window size (None = full period)
             
         Returns:
             Tuple of (correlation, min_correlation, max_correlation)
         """
         # Align series
-        aligned = pd.DataFrame({'a': price_a, 'b': price_b}).dropna()
+        values_a, values_b = align_prices(price_a, price_b)
         
-        if len(aligned) < 30:
+        if len(values_a) < 30:
             return 0.0, 0.0, 0.0
         
-        # Calculate returns
-        returns_a = aligned['a'].pct_change().dropna()
-        returns_b = aligned['b'].pct_change().dropna()
+        # Calculate returns on plain arrays (same values as pct_change)
+        returns_a = _simple_returns(values_a)
+        returns_b = _simple_returns(values_b)
         
         # Align returns
-        returns_aligned = pd.DataFrame({'a': returns_a, 'b': returns_b}).dropna()
+        valid = ~(np.isnan(returns_a) | np.isnan(returns_b))
+        returns_a = returns_a[valid]
+        returns_b = returns_b[valid]
         
-        if len(returns_aligned) < 30:
+        if len(returns_a) < 30:
             return 0.0, 0.0, 0.0
         
         # Check for zero standard deviation (constant returns)
-        std_a = returns_aligned['a'].std()
-        std_b = returns_aligned['b'].std()
+        std_a = returns_a.std(ddof=1)
+        std_b = returns_b.std(ddof=1)
         
         if std_a == 0 or std_b == 0:
             # If either series has zero variance, correlation is undefined
@@ -53,42 +165,85 @@ class CorrelationAnalyzer:
             return 0.0, 0.0, 0.0
         
         if window:
-            # Rolling correlation with warning suppression
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore", RuntimeWarning)
-                rolling_corr = returns_aligned['a'].rolling(window=window).corr(returns_aligned['b'])
-                rolling_corr = rolling_corr.dropna()
+            # Rolling correlation from prefix sums (one O(T) pass for all windows)
+            rolling_corr = rolling_corr_fast(returns_a, returns_b, window)
+            rolling_corr = rolling_corr[~np.isnan(rolling_corr)]
             
             if len(rolling_corr) == 0:
                 # Fallback to full period
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore", RuntimeWarning)
-                    corr = returns_aligned['a'].corr(returns_aligned['b'])
+                corr = _pearson(returns_a, returns_b, std_a, std_b)
                 # Handle NaN from correlation calculation
-                if pd.isna(corr):
+                if np.isnan(corr):
                     return 0.0, 0.0, 0.0
                 return corr, corr, corr
             
-            # Filter out NaN values
-            rolling_corr = rolling_corr[~pd.isna(rolling_corr)]
-            if len(rolling_corr) == 0:
-                return 0.0, 0.0, 0.0
-            
             min_corr = rolling_corr.min()
             max_corr = rolling_corr.max()
             mean_corr = rolling_corr.mean()
             
             return mean_corr, min_corr, max_corr
         else:
-            # Full period correlation with warning suppression
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore", RuntimeWarning)
-                corr = returns_aligned['a'].corr(returns_aligned['b'])
+            # Full period correlation
+            corr = _pearson(returns_a, returns_b, std_a, std_b)
             # Handle NaN from correlation calculation
-            if pd.isna(corr):
+            if np.isnan(corr):
                 return 0.0, 0.0, 0.0
             return corr, corr, corr
     
+    @staticmethod
+    def correlation_from_stats(stats_a: AssetStatsCache, stats_b: AssetStatsCache) -> float:
+        """
+        Full-period return correlation of two cached assets on the same dates
+        
+        Same result as calculate_correlation for NaN-free, date-aligned prices, from the
+        cached means / stds and a single dot product.
+        
+        Args:
+            stats_a: Cached statistics of asset A
+            stats_b: Cached statistics of asset B (same dates as stats_a)
+            
+        Returns:
+            Correlation, 0.0 for fewer than 30 returns or constant returns
+        """
+        n = len(stats_a.returns)
+        if n < 30 or stats_a.std == 0 or stats_b.std == 0:
+            return 0.0
+        
+        corr = (
+            np.dot(stats_a.returns - stats_a.mean, stats_b.returns - stats_b.mean)
+            / (n - 1) / (stats_a.std * stats_b.std)
+        )
+        if np.isnan(corr):
+            return 0.0
+        return float(np.clip(corr, -1.0, 1.0))
+    
+    @staticmethod
+    def pairwise_correlation_matrix(prices: np.ndarray, dtype: type = np.float64) -> np.ndarray:
+        """
+        Full-period return correlation of every pair of assets in one np.corrcoef call
+        
+        Args:
+            prices: Price matrix (T x K), one column per asset, on a common date index
+            dtype: Precision of the returns and the correlation product (np.float32 is
+                enough when the matrix only feeds a threshold); returned as float64
+            
+        Returns:
+            K x K correlation matrix of simple returns (rows with any NaN return dropped);
+            0.0 where undefined, as calculate_correlation returns for constant returns or
+            fewer than 30 returns
+        """
+        prices = np.asarray(prices, dtype=dtype)
+        n_assets = prices.shape[1]
+        
+        returns = _simple_returns(prices)
+        returns = returns[~np.isnan(returns).any(axis=1)]
+        if len(returns) < 30:
+            return np.zeros((n_assets, n_assets))
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.corrcoef(returns, rowvar=False, dtype=dtype)
+        return np.nan_to_num(corr, nan=0.0).astype(np.float64, copy=False)
+    
     @staticmethod
     def calculate_volatility_ratio(price_a: pd.Series, price_b: pd.Series) -> float:
         """
@@ -101,11 +256,13 @@ class CorrelationAnalyzer:
         Returns:
             Volatility ratio: σ_A / σ_B
         """
-        returns_a = price_a.pct_change().dropna()
-        returns_b = price_b.pct_change().dropna()
+        returns_a = _simple_returns(np.asarray(price_a, dtype=float))
+        returns_b = _simple_returns(np.asarray(price_b, dtype=float))
+        returns_a = returns_a[~np.isnan(returns_a)]
+        returns_b = returns_b[~np.isnan(returns_b)]
         
-        vol_a = returns_a.std()
-        vol_b = returns_b.std()
+        vol_a = returns_a.std(ddof=1) if len(returns_a) > 1 else np.nan
+        vol_b = returns_b.std(ddof=1) if len(returns_b) > 1 else np.nan
         
         if vol_b == 0:
             return 1.0
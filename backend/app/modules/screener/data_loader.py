@@ -1,17 +1,41 @@
 """
 Data loader for fetching cryptocurrency price data from Binance
 """
+import asyncio
+import aiohttp
 import ccxt
+import ccxt.async_support as ccxt_async
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Optional, List, Dict
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.database import PriceDataCache
 from app.config import settings
+import certifi
+import itertools
+import re
+import sqlite3
+import ssl
 import time
 import threading
-import pickle
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+
+
+# Ticker filters used by get_top_assets
+_STABLECOINS = frozenset({'USDT', 'USDC', 'BUSD', 'DAI', 'TUSD', 'USDP', 'USDD'})
+_DELIVERY_SUFFIX_RE = re.compile(r'_[^_]*\d[^_]*$')  # Date after the last '_' (e.g. BTCUSDT_240329)
+_SLASH_SYMBOL_RE = re.compile(r'^([^/]*)/([^/:]*)')  # BASE/QUOTE, optionally followed by :SETTLE
+
+# Dialect-specific INSERT constructs that support ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    'sqlite': sqlite_insert,
+    'postgresql': postgresql_insert,
+}
 
 
 class DataLoader:
@@ -42,27 +66,108 @@ class DataLoader:
                 'defaultType': 'future'  # Use futures instead of spot (futures can be shorted)
             }
         })
-        # In-memory cache to avoid duplicate requests
+        # Keep-alive pool sized for the preload and ticker workers sharing this session
+        http_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20)
+        self.exchange.session.mount('https://', http_adapter)
+        self.exchange.session.mount('http://', http_adapter)
+        # In-memory cache to avoid duplicate requests. The dict is never mutated:
+        # writers build a new one under _cache_lock and rebind it (copy-on-write),
+        # so readers look entries up without taking any lock
         self._price_cache: Dict[str, pd.Series] = {}
         self._cache_lock = threading.Lock()
+        self._max_cached_series = 200
+        # Recency stamps for LRU eviction, bumped on hits without taking the lock
+        self._cache_clock = itertools.count()
+        self._cache_last_used: Dict[str, int] = {}
         self._last_request_time = 0
         self._min_request_interval = 0.5  # Minimum 500ms between requests (2 requests per second max)
         self._request_lock = threading.Lock()  # Lock for serializing requests
+        # fetch_tickers response shared by get_top_assets calls: (fetched_at, tickers)
+        self._tickers_cache = (0.0, {})
+        self._tickers_ttl = 60  # seconds
+        self._tickers_lock = threading.Lock()
+        # Single reusable worker for blocking exchange calls that need a timeout
+        self._net_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="binance-net")
         # Cache for failed symbols to avoid spam in logs and repeated requests
         self._failed_symbols: set = set()
         # Cache for symbols with insufficient data (to avoid repeated requests)
         self._insufficient_data_symbols: Dict[str, int] = {}  # symbol -> days_available
+        # Both are persisted (see _record_symbol_status) and reloaded for this long; failures
+        # are usually transient (rate limits, network errors), so they expire much sooner
+        self._symbol_status_ttl = 24 * 60 * 60  # seconds
+        self._failed_status_ttl = 15 * 60  # seconds
         
-        # Locks for individual cache keys to prevent duplicate requests
-        self._fetching_locks: Dict[str, threading.Lock] = {}
-        self._fetching_locks_lock = threading.Lock()  # Lock for managing fetching_locks dict
+        # In-flight loads by cache key: concurrent callers wait on the same Future
+        # instead of repeating the request
+        self._fetching_futures: Dict[str, Future] = {}
+        self._fetching_lock = threading.Lock()  # Lock for managing fetching_futures dict
         
-        # Persistent file cache directory
-        self._cache_dir = Path("cache/price_data")
-        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        # Persistent cache: one SQLite database of (symbol, ts, close) rows
+        cache_path = Path("cache/prices.db")
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._cache_db = sqlite3.connect(cache_path, check_same_thread=False, isolation_level=None)
+        self._cache_db.execute("PRAGMA journal_mode=WAL")
+        self._cache_db.execute("PRAGMA synchronous=NORMAL")
+        self._cache_db.execute(f"PRAGMA mmap_size={256 * 1024 * 1024}")  # Memory-mapped page reads
+        self._cache_db.execute(
+            "CREATE TABLE IF NOT EXISTS prices("
+            "symbol TEXT NOT NULL, ts INTEGER NOT NULL, close REAL NOT NULL, "
+            "PRIMARY KEY(symbol, ts)) WITHOUT ROWID"
+        )
+        self._cache_db.execute(
+            "CREATE TABLE IF NOT EXISTS symbol_status("
+            "symbol TEXT NOT NULL, kind TEXT NOT NULL, days_available INTEGER, recorded_at REAL NOT NULL, "
+            "PRIMARY KEY(symbol, kind))"
+        )
+        self._cache_db_lock = threading.Lock()  # One connection shared by all threads
+        self._load_symbol_status()
         
         self._initialized = True
     
+    def _load_symbol_status(self) -> None:
+        """Reload failed / insufficient-data symbols recorded within the TTL (drops older ones)"""
+        try:
+            with self._cache_db_lock:
+                now = time.time()
+                self._cache_db.execute(
+                    "DELETE FROM symbol_status WHERE recorded_at < ? OR (kind = 'failed' AND recorded_at < ?) "
+                    "OR (kind = 'insufficient' AND days_available <= 0)",
+                    (now - self._symbol_status_ttl, now - self._failed_status_ttl)
+                )
+                rows = self._cache_db.execute("SELECT symbol, kind, days_available FROM symbol_status").fetchall()
+        except Exception:
+            return
+        for symbol, kind, days_available in rows:
+            if kind == 'failed':
+                self._failed_symbols.add(symbol)
+            elif kind == 'insufficient':
+                self._insufficient_data_symbols[symbol] = days_available
+    
+    def _record_symbol_status(self, symbol: str, kind: str, days_available: Optional[int] = None) -> None:
+        """Write a symbol's fetch outcome through to the database (non-critical)"""
+        try:
+            with self._cache_db_lock:
+                self._cache_db.execute(
+                    "INSERT OR REPLACE INTO symbol_status(symbol, kind, days_available, recorded_at) VALUES (?, ?, ?, ?)",
+                    (symbol, kind, days_available, time.time())
+                )
+        except Exception:
+            pass
+    
+    def _mark_failed(self, symbol: str) -> None:
+        """Remember that fetching a symbol failed"""
+        self._failed_symbols.add(symbol)
+        self._record_symbol_status(symbol, 'failed')
+    
+    def _mark_insufficient(self, symbol: str, days_available: int) -> None:
+        """Remember how many days of history a symbol has when that is too few (at least one)"""
+        if days_available <= 0:
+            # An empty fetch is a failure, not a short history: never block the symbol for it
+            self._mark_failed(symbol)
+            return
+        self._insufficient_data_symbols[symbol] = days_available
+        self._record_symbol_status(symbol, 'insufficient', days_available)
+    
     def get_top_assets(self, limit: Optional[int] = None, min_volume_usd: float = 1_000_000) -> List[str]:
         """
         Get cryptocurrencies by volume from Binance (NO FALLBACK - real data only)
@@ -74,6 +179,71 @@ class DataLoader:
         Returns:
             List of asset symbols (e.g., ['BTC', 'ETH', 'SOL'])
             
+        Raises:
+            ValueError: If unable to fetch data from Binance
+            TimeoutError: If request times out
+        """
+        # Tickers are reused for a short TTL, so repeated calls skip the round-trip
+        with self._tickers_lock:
+            fetched_at, tickers = self._tickers_cache
+            if time.time() - fetched_at >= self._tickers_ttl:
+                tickers = self._fetch_tickers()
+                self._tickers_cache = (time.time(), tickers)
+        
+        # Filter and sort by volume, one vectorized pass over all tickers
+        df = pd.DataFrame.from_dict(tickers, orient='index')
+        symbols = pd.Series(df.index.astype(str), index=df.index)
+        
+        def column(name, default):
+            return df[name] if name in df.columns else pd.Series(default, index=df.index)
+        
+        # Check if market is active
+        keep = column('active', True).fillna(True).astype(bool)
+        
+        # Filter only perpetual contracts (skip delivery futures with expiration)
+        # Perpetual contracts don't have expiration date
+        for expiry_key in ('expiry', 'expires', 'expiration'):
+            keep &= column(expiry_key, None).isna()
+        # Skip if it's explicitly a delivery contract
+        keep &= ~column('type', '').fillna('').astype(str).str.lower().str.contains('delivery', regex=False)
+        # Skip contracts with date in symbol (e.g., BTCUSDT_240329 for delivery)
+        keep &= ~symbols.str.contains(_DELIVERY_SUFFIX_RE)
+        
+        # Handle different symbol formats: BTC/USDT, BTCUSDT, BTC/USDT:USDT
+        slash_parts = symbols.str.extract(_SLASH_SYMBOL_RE)
+        has_slash = slash_parts[0].notna()
+        futures_format = ~has_slash & symbols.str.endswith('USDT')
+        base = slash_parts[0].where(has_slash, symbols.str.replace('USDT', '', regex=False))
+        quote = slash_parts[1].where(has_slash, 'USDT')
+        
+        # Only USDT pairs (stablecoins excluded)
+        keep &= (has_slash | futures_format) & (quote == 'USDT') & (base != '') & ~base.isin(_STABLECOINS)
+        
+        quote_volume = pd.to_numeric(column('quoteVolume', np.nan), errors='coerce')
+        volume_usd = quote_volume.where(quote_volume.notna() & (quote_volume != 0),
+                                        pd.to_numeric(column('volume', 0), errors='coerce'))
+        keep &= volume_usd.notna() & (volume_usd != 0) & (volume_usd >= min_volume_usd)
+        
+        # Sort by volume (stable, so equal volumes keep the exchange's order)
+        ranked = volume_usd[keep].sort_values(ascending=False, kind='stable')
+        top_assets = base[ranked.index].tolist()
+        
+        if not top_assets:
+            raise ValueError("No valid assets found from Binance matching the criteria")
+        
+        # Apply limit if specified
+        if limit:
+            top_assets = top_assets[:limit]
+        
+        return top_assets
+    
+    def _fetch_tickers(self) -> Dict[str, dict]:
+        """
+        Fetch all tickers from Binance (NO CACHE CHECKING - just fetch from API)
+        
+        Returns:
+            Dictionary of ccxt tickers by symbol
+            
         Raises:
             ValueError: If unable to fetch data from Binance
             TimeoutError: If request times out
@@ -85,28 +255,24 @@ class DataLoader:
             time.sleep(self._min_request_interval - time_since_last)
         
         # Fetch tickers to get volume information (with increased timeout)
-        # Use threading for timeout on Windows
-        import threading
-        tickers_result = [None]
-        tickers_error = [None]
-        
-        def fetch_tickers_thread():
-            try:
-                tickers_result[0] = self.exchange.fetch_tickers()
-            except Exception as e:
-                tickers_error[0] = e
-        
-        thread = threading.Thread(target=fetch_tickers_thread)
-        thread.daemon = True
-        thread.start()
-        thread.join(timeout=90)  # Increased timeout to 90 seconds
-        
-        # NO FALLBACK - throw error if timeout
-        if thread.is_alive():
+        # Run on the reusable network worker so the wait can time out (works on Windows)
+        pool = self._net_pool
+        future = pool.submit(self.exchange.fetch_tickers)
+        try:
+            tickers = future.result(timeout=90)  # Increased timeout to 90 seconds
+            error = None
+        except FutureTimeoutError:
+            # NO FALLBACK - throw error if timeout. The worker is still stuck in the
+            # request, so later calls get a fresh one; the old one exits when it returns
+            future.cancel()
+            self._net_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="binance-net")
+            pool.shutdown(wait=False)
             raise TimeoutError("Binance API request timed out after 90 seconds. Please try again.")
+        except Exception as e:
+            tickers = None
+            error = e
         
-        if tickers_error[0]:
-            error = tickers_error[0]
+        if error:
             error_msg = str(error)
             # Check for geographic restriction (451)
             if '451' in error_msg or 'restricted location' in error_msg.lower() or 'Eligibility' in error_msg:
@@ -117,69 +283,11 @@ class DataLoader:
             else:
                 raise ValueError(f"Failed to fetch assets from Binance: {error}")
         
-        if tickers_result[0] is None:
+        if tickers is None:
             raise ValueError("Binance API returned None - no data received")
         
-        tickers = tickers_result[0]
         self._last_request_time = time.time()
-        
-        # Filter and sort by volume
-        valid_tickers = []
-        for symbol, ticker in tickers.items():
-            # Check if market is active
-            if not ticker.get('active', True):
-                continue
-            
-            # Filter only perpetual contracts (skip delivery futures with expiration)
-            # Perpetual contracts don't have expiration date
-            # Also check contract type if available
-            contract_type = ticker.get('type', '').lower()
-            if 'expiry' in ticker or 'expires' in ticker or 'expiration' in ticker:
-                continue
-            # Skip if it's explicitly a delivery contract
-            if contract_type and 'delivery' in contract_type:
-                continue
-            # Skip contracts with date in symbol (e.g., BTCUSDT_240329 for delivery)
-            if '_' in symbol and any(char.isdigit() for char in symbol.split('_')[-1]):
-                continue
-            
-            base = None
-            # Handle different symbol formats: BTC/USDT, BTCUSDT, BTC/USDT:USDT
-            if '/' in symbol:
-                parts = symbol.split('/')
-                base = parts[0]
-                quote = parts[1].split(':')[0] if ':' in parts[1] else parts[1]
-            elif symbol.endswith('USDT'):
-                # Futures format: BTCUSDT
-                base = symbol.replace('USDT', '')
-                quote = 'USDT'
-            else:
-                continue
-            
-            # Only USDT pairs
-            if quote == 'USDT' and base:
-                volume_usd = ticker.get('quoteVolume', 0) or ticker.get('volume', 0)
-                if volume_usd and volume_usd >= min_volume_usd:
-                    valid_tickers.append({
-                        'symbol': base,
-                        'volume': volume_usd
-                    })
-        
-        # Sort by volume
-        valid_tickers.sort(key=lambda x: x['volume'], reverse=True)
-        
-        # Exclude stablecoins
-        stablecoins = {'USDT', 'USDC', 'BUSD', 'DAI', 'TUSD', 'USDP', 'USDD'}
-        top_assets = [t['symbol'] for t in valid_tickers if t['symbol'] not in stablecoins]
-        
-        if not top_assets:
-            raise ValueError("No valid assets found from Binance matching the criteria")
-        
-        # Apply limit if specified
-        if limit:
-            top_assets = top_assets[:limit]
-        
-        return top_assets
+        return tickers
     
     def fetch_ohlcv(
         self, 
@@ -221,7 +329,8 @@ class DataLoader:
                     # Multiple requests needed for > 1000 days
                     # Binance returns data from 'since' to now, max 1000 candles
                     # Strategy: fetch batches going backwards in time
-                    all_ohlcv = []
+                    all_ohlcv = []  # One float64 (n, 6) array per batch
+                    oldest_timestamp = None
                     now_ms = self.exchange.milliseconds()
                     batches_needed = (days + 999) // 1000  # Round up
                     
@@ -248,6 +357,7 @@ class DataLoader:
                         
                         if not batch_ohlcv:
                             break
+                        batch_ohlcv = np.asarray(batch_ohlcv, dtype=np.float64)
                         
                         if batch_num == 0:
                             # First batch: take the most recent candles (up to batch_end_days_back)
@@ -256,42 +366,36 @@ class DataLoader:
                                 batch_ohlcv = batch_ohlcv[-batch_end_days_back:]
                         else:
                             # Subsequent batches: filter out candles we already have
-                            if all_ohlcv:
-                                oldest_timestamp = min(candle[0] for candle in all_ohlcv)
+                            if oldest_timestamp is not None:
                                 # Take only candles older than what we already have
-                                batch_ohlcv = [c for c in batch_ohlcv if c[0] < oldest_timestamp]
+                                batch_ohlcv = batch_ohlcv[batch_ohlcv[:, 0] < oldest_timestamp]
                                 # Take the most recent ones from this batch (up to 1000)
                                 if len(batch_ohlcv) > 1000:
                                     batch_ohlcv = batch_ohlcv[-1000:]
                         
-                        if batch_ohlcv:
-                            all_ohlcv.extend(batch_ohlcv)
+                        if len(batch_ohlcv):
+                            all_ohlcv.append(batch_ohlcv)
+                            batch_oldest = batch_ohlcv[:, 0].min()
+                            if oldest_timestamp is None or batch_oldest < oldest_timestamp:
+                                oldest_timestamp = batch_oldest
                         
                         # Rate limiting between batches
                         if batch_num < batches_needed - 1:
                             time.sleep(0.5)
                     
-                    # Sort by timestamp (oldest first) and remove duplicates
-                    all_ohlcv.sort(key=lambda x: x[0])
-                    seen = set()
-                    unique_ohlcv = []
-                    for candle in all_ohlcv:
-                        if candle[0] not in seen:
-                            seen.add(candle[0])
-                            unique_ohlcv.append(candle)
-                    ohlcv = unique_ohlcv
+                    # Sort by timestamp (oldest first) and remove duplicates (first one wins)
+                    ohlcv = np.concatenate(all_ohlcv) if all_ohlcv else np.empty((0, 6))
+                    _, first = np.unique(ohlcv[:, 0], return_index=True)
+                    ohlcv = ohlcv[first]
                     
                     # Take only the most recent 'days' candles
                     if len(ohlcv) > days:
                         ohlcv = ohlcv[-days:]
                 
-                if not ohlcv:
+                if ohlcv is None or len(ohlcv) == 0:
                     return pd.DataFrame()
                 
-                df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                df['date'] = pd.to_datetime(df['timestamp'], unit='ms')
-                df.set_index('date', inplace=True)
-                df = df[['open', 'high', 'low', 'close', 'volume']]
+                df = self._ohlcv_to_frame(ohlcv)
                 
                 # Log date range for debugging
                 if symbol in ['1000SHIB', 'SHIB', 'GALA'] or days > 200:
@@ -307,21 +411,10 @@ class DataLoader:
                 # Cache in database (optional)
                 if db:
                     try:
-                        for date, row in df.iterrows():
-                            price_data = PriceDataCache(
-                                symbol=symbol,
-                                date=date.date(),
-                                open=float(row['open']),
-                                high=float(row['high']),
-                                low=float(row['low']),
-                                close=float(row['close']),
-                                volume=float(row['volume'])
-                            )
-                            db.merge(price_data)  # Use merge to handle duplicates
-                        db.commit()
+                        self._upsert_price_rows(db, symbol, df)
                     except Exception as db_error:
                         # Database error is not critical
-                        pass
+                        db.rollback()
                 
                 return df
                 
@@ -353,11 +446,457 @@ class DataLoader:
                     # Only print error once per symbol to avoid log spam
                     if symbol not in self._failed_symbols:
                         print(f"Error fetching data for {symbol}: {e}")
-                        self._failed_symbols.add(symbol)
+                        self._mark_failed(symbol)
                     return pd.DataFrame()
         
         return pd.DataFrame()
     
+    @staticmethod
+    def _ohlcv_to_frame(ohlcv: list, dedupe: bool = False) -> pd.DataFrame:
+        """
+        Convert ccxt OHLCV candles into a DataFrame in one numpy conversion
+        
+        Args:
+            ohlcv: Candles as [timestamp_ms, open, high, low, close, volume] lists
+            dedupe: Keep one candle per timestamp, sorted oldest first
+            
+        Returns:
+            DataFrame with columns: open, high, low, close, volume (date index)
+        """
+        arr = np.asarray(ohlcv, dtype=np.float64)
+        if dedupe:
+            _, first = np.unique(arr[:, 0], return_index=True)
+            arr = arr[first]
+        dates = arr[:, 0].astype(np.int64).astype('datetime64[ms]')
+        return pd.DataFrame(
+            arr[:, 1:],
+            columns=['open', 'high', 'low', 'close', 'volume'],
+            index=pd.DatetimeIndex(dates, name='date'),
+            copy=False
+        )
+    
+    @staticmethod
+    def _upsert_price_rows(db: Session, symbol: str, df: pd.DataFrame) -> None:
+        """
+        Insert or update a symbol's OHLCV rows in the price_data_cache table
+        
+        One parameterized upsert on (symbol, date) runs for all rows, then one commit.
+        Backends without an ON CONFLICT upsert (anything but SQLite/PostgreSQL) are
+        not cached.
+        
+        Args:
+            db: Database session
+            symbol: Asset symbol
+            df: OHLCV DataFrame indexed by date
+        """
+        insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if insert is None or df.empty:
+            return
+        columns = ['open', 'high', 'low', 'close', 'volume']
+        values = df[columns].to_numpy(dtype=float).tolist()
+        records = [
+            dict(zip(columns, row), symbol=symbol, date=date)
+            for date, row in zip(df.index.date, values)
+        ]
+        stmt = insert(PriceDataCache)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['symbol', 'date'],
+            set_={column: stmt.excluded[column] for column in columns}
+        )
+        db.execute(stmt, records)
+        db.commit()
+    
+    async def _fetch_ohlcv_async(
+        self,
+        exchange,
+        semaphore: asyncio.Semaphore,
+        symbol: str,
+        days: int
+    ) -> pd.DataFrame:
+        """
+        Fetch OHLCV data for one symbol on the async exchange (see fetch_ohlcv_many)
+        
+        Args:
+            exchange: Shared ccxt async_support exchange
+            semaphore: Bounds the number of symbols in flight
+            symbol: Asset symbol (e.g., 'BTC')
+            days: Number of days of historical data
+            
+        Returns:
+            DataFrame with columns: open, high, low, close, volume (date index),
+            empty if nothing could be fetched
+        """
+        symbol_pair = f"{symbol}/USDT"
+        max_candles_per_request = 1500  # Futures klines cap (spot is 1000)
+        day_ms = 24 * 60 * 60 * 1000
+        max_retries = 3
+        
+        async with semaphore:
+            for attempt in range(max_retries):
+                try:
+                    now_ms = exchange.milliseconds()
+                    all_ohlcv = []
+                    # Batches going backwards in time, most recent first
+                    for batch_start in range(0, days, max_candles_per_request):
+                        batch_end = min(batch_start + max_candles_per_request, days)
+                        batch_ohlcv = await exchange.fetch_ohlcv(
+                            symbol_pair, '1d',
+                            since=now_ms - batch_end * day_ms,
+                            limit=max_candles_per_request
+                        )
+                        if not batch_ohlcv:
+                            break
+                        all_ohlcv.extend(batch_ohlcv)
+                    break
+                except ccxt.RateLimitExceeded:
+                    if attempt == max_retries - 1:
+                        print(f"Rate limit exceeded for {symbol} after {max_retries} attempts.")
+                        return pd.DataFrame()
+                    await asyncio.sleep(10 * (attempt + 1))
+                except Exception as e:
+                    if symbol not in self._failed_symbols:
+                        print(f"Error fetching data for {symbol}: {e}")
+                        self._mark_failed(symbol)
+                    return pd.DataFrame()
+        
+        if not all_ohlcv:
+            return pd.DataFrame()
+        
+        # Overlapping batches repeat candles; keep one per timestamp, oldest first
+        return self._ohlcv_to_frame(all_ohlcv, dedupe=True).tail(days)
+    
+    async def fetch_ohlcv_many(
+        self,
+        symbols: List[str],
+        days: int = 365,
+        max_concurrency: int = 10
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch OHLCV data for many symbols concurrently (NO CACHE CHECKING)
+        
+        All requests share one async exchange, whose built-in rate limiter is a
+        single token bucket weighted by endpoint cost, so the fan-out stays within
+        Binance's request weight budget; the semaphore caps requests in flight.
+        The exchange runs on one HTTP session whose keep-alive pool holds a
+        connection per concurrent symbol, so TLS sessions and DNS lookups are
+        reused across batches.
+        
+        Args:
+            symbols: Asset symbols (e.g., ['BTC', 'ETH'])
+            days: Number of days of historical data
+            max_concurrency: Maximum number of symbols fetched at the same time
+            
+        Returns:
+            Dictionary mapping each symbol to its DataFrame (empty on failure)
+        """
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(
+            limit=max_concurrency,
+            ttl_dns_cache=300,
+            ssl=ssl.create_default_context(cafile=certifi.where())
+        ))
+        exchange = ccxt_async.binance({
+            'apiKey': settings.BINANCE_API_KEY,
+            'secret': settings.BINANCE_API_SECRET,
+            'enableRateLimit': True,
+            'session': session,  # Not owned by ccxt: closed below
+            'options': {
+                'defaultType': 'future'
+            }
+        })
+        semaphore = asyncio.Semaphore(max_concurrency)
+        try:
+            frames = await asyncio.gather(*(
+                self._fetch_ohlcv_async(exchange, semaphore, symbol, days)
+                for symbol in symbols
+            ))
+        finally:
+            await exchange.close()
+            await session.close()
+        return dict(zip(symbols, frames))
+    
+    def preload_price_series(self, symbols: List[str], days: int = 365, max_concurrency: int = 10) -> int:
+        """
+        Warm the file and memory caches for many symbols with one concurrent fetch
+        
+        Symbols already in memory (or known to lack history) are skipped, and those
+        with enough persistent history are loaded into memory with a single query;
+        the rest are fetched through fetch_ohlcv_many and stored exactly as
+        get_price_series would store them, so later get_price_series calls are
+        cache hits. Symbols whose fetch failed are left to get_price_series' own
+        fetch and retry logic.
+        
+        Args:
+            symbols: Asset symbols
+            days: Number of days
+            max_concurrency: Maximum number of symbols fetched at the same time
+            
+        Returns:
+            Number of symbols fetched and cached
+        """
+        candidates = []
+        for symbol in symbols:
+            if self._insufficient_data_symbols.get(symbol, days) < days * 0.8:
+                continue
+            cached = self._cache_get(f"{symbol}_{days}")
+            if cached is not None and len(cached) >= days * 0.8:
+                continue
+            candidates.append(symbol)
+        
+        # Warm start: every candidate's persistent history in one pass over the database
+        try:
+            on_disk = self._read_file_cache_many(candidates, days)
+        except Exception:
+            on_disk = {}
+        warm = {
+            f"{symbol}_{days}": price_series
+            for symbol, price_series in on_disk.items()
+            if len(price_series) >= days * 0.8
+        }
+        self._cache_put(warm)
+        missing = [symbol for symbol in candidates if f"{symbol}_{days}" not in warm]
+        
+        if not missing:
+            return 0
+        
+        print(f"Fetching {days} days of data for {len(missing)} symbols ({max_concurrency} at a time)...")
+        coro = self.fetch_ohlcv_many(missing, days, max_concurrency)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            frames = asyncio.run(coro)
+        else:
+            # Called from inside an event loop (e.g. an async route): run on a helper thread
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                frames = executor.submit(asyncio.run, coro).result()
+        
+        fetched = {}
+        for symbol, df in frames.items():
+            if df.empty:
+                continue
+            price_series = df['close']
+            if len(price_series) < days * 0.8:
+                self._mark_insufficient(symbol, len(price_series))
+            try:
+                self._write_file_cache(symbol, price_series)
+            except Exception:
+                # Non-critical if file cache fails
+                pass
+            fetched[f"{symbol}_{days}"] = price_series
+        
+        # One swap of the memory cache for the whole batch
+        self._cache_put(fetched)
+        print(f"  ✓ Fetched {len(fetched)}/{len(missing)} symbols")
+        return len(fetched)
+    
+    def get_price_series_many(
+        self,
+        symbols: List[str],
+        days: int = 365,
+        db: Optional[Session] = None
+    ) -> pd.DataFrame:
+        """
+        Get closing prices of many symbols as one date-aligned DataFrame
+        
+        Cached histories are loaded in one query and the rest fetched concurrently
+        (see preload_price_series); each symbol then comes from the memory cache,
+        or from get_price_series' own fetch and retry logic if the preload missed it.
+        
+        Args:
+            symbols: Asset symbols
+            days: Number of days
+            db: Database session
+            
+        Returns:
+            DataFrame with dates as index and one column per symbol (in the given
+            order), NaN where a symbol has no price for a date; symbols without
+            data are all-NaN columns
+        """
+        try:
+            self.preload_price_series(symbols, days)
+        except Exception as e:
+            print(f"⚠️  Concurrent price preload failed, falling back to per-symbol fetches: {e}")
+        
+        loaded = {}
+        for symbol in symbols:
+            try:
+                price_series = self.get_price_series(symbol, days, db)
+            except Exception as e:
+                print(f"Error loading price series for {symbol}: {e}")
+                continue
+            if len(price_series) > 0:
+                loaded[symbol] = price_series
+        
+        if not loaded:
+            return pd.DataFrame(columns=symbols, dtype=float)
+        prices = pd.concat(loaded, axis=1)
+        if not prices.index.is_monotonic_increasing:
+            prices = prices.sort_index()
+        return prices.reindex(columns=symbols)
+    
+    def _cache_put(self, entries: Dict[str, pd.Series]) -> None:
+        """
+        Add series to the in-memory cache by swapping in an updated copy of the dict
+        
+        Entries are stored on their own read-only float64 copy of the values, so
+        cache hits hand out the cached series itself: callers must treat it as
+        read-only, and an in-place write raises instead of corrupting the cache.
+        Values keep full precision, so a hit returns exactly what the first load
+        returned. Beyond the size limit the least recently used entries are dropped.
+        
+        Args:
+            entries: Series to cache by cache key ("<symbol>_<days>")
+        """
+        if not entries:
+            return
+        frozen = {}
+        for cache_key, price_series in entries.items():
+            values = price_series.to_numpy(dtype=np.float64, copy=True)
+            values.setflags(write=False)
+            frozen[cache_key] = pd.Series(values, index=price_series.index, name=price_series.name, copy=False)
+        with self._cache_lock:
+            cache = dict(self._price_cache)
+            for cache_key, price_series in frozen.items():
+                cache[cache_key] = price_series
+                self._cache_last_used[cache_key] = next(self._cache_clock)
+            # Limit cache size to prevent memory issues
+            excess = len(cache) - self._max_cached_series
+            if excess > 0:
+                for stale_key in sorted(cache, key=lambda key: self._cache_last_used.get(key, -1))[:excess]:
+                    del cache[stale_key]
+                    self._cache_last_used.pop(stale_key, None)
+            self._price_cache = cache
+    
+    def _cache_get(self, cache_key: str) -> Optional[pd.Series]:
+        """Look up an in-memory cache entry (lock-free) and mark it as recently used"""
+        price_series = self._price_cache.get(cache_key)
+        # Only stamp keys still cached: a reader of an older dict must not revive an evicted key
+        if price_series is not None and cache_key in self._price_cache:
+            self._cache_last_used[cache_key] = next(self._cache_clock)
+        return price_series
+    
+    def _cache_drop(self, predicate) -> None:
+        """Remove the in-memory cache entries whose key matches predicate (copy-on-write)"""
+        with self._cache_lock:
+            if not any(predicate(cache_key) for cache_key in self._price_cache):
+                return  # Nothing to drop: readers keep the current dict
+            self._price_cache = {
+                cache_key: price_series
+                for cache_key, price_series in self._price_cache.items()
+                if not predicate(cache_key)
+            }
+            # Iterate a snapshot of the stamps: lock-free readers may add one meanwhile
+            self._cache_last_used = {
+                cache_key: stamp
+                for cache_key, stamp in list(self._cache_last_used.items())
+                if cache_key in self._price_cache
+            }
+    
+    def _read_file_cache(self, symbol: str, days: Optional[int] = None) -> Optional[pd.Series]:
+        """
+        Read a symbol's closes from the persistent cache
+        
+        Args:
+            symbol: Asset symbol
+            days: Number of most recent days to read (None = everything cached)
+            
+        Returns:
+            Close price series (possibly shorter than 'days'), or None if not cached
+        """
+        with self._cache_db_lock:
+            # Most recent 'days' rows straight off the (symbol, ts) primary key
+            rows = self._cache_db.execute(
+                "SELECT ts, close FROM prices WHERE symbol = ? ORDER BY ts DESC LIMIT ?",
+                (symbol, -1 if days is None else days)
+            ).fetchall()
+        if not rows:
+            return None
+        records = np.array(rows[::-1], dtype=[('ts', 'i8'), ('close', 'f8')])
+        return pd.Series(
+            records['close'],
+            index=pd.DatetimeIndex(records['ts'].astype('datetime64[ms]'), name='date'),
+            name='close'
+        )
+    
+    def _read_file_cache_many(self, symbols: List[str], days: int) -> Dict[str, pd.Series]:
+        """
+        Read many symbols' closes from the persistent cache in one query per chunk
+        
+        Args:
+            symbols: Asset symbols
+            days: Number of most recent days to read per symbol
+            
+        Returns:
+            Dictionary of close price series (possibly shorter than 'days') for the
+            symbols that are cached
+        """
+        rows = []
+        chunk_size = 500  # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(symbols), chunk_size):
+            chunk = symbols[start:start + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            with self._cache_db_lock:
+                rows += self._cache_db.execute(
+                    "SELECT symbol, ts, close FROM ("
+                    "SELECT symbol, ts, close, "
+                    "ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY ts DESC) AS age "
+                    f"FROM prices WHERE symbol IN ({placeholders})"
+                    ") WHERE age <= ? ORDER BY symbol, ts",
+                    (*chunk, days)
+                ).fetchall()
+        if not rows:
+            return {}
+        
+        symbol_column, ts, close = zip(*rows)
+        ts = np.array(ts, dtype=np.int64).astype('datetime64[ms]')
+        close = np.array(close, dtype=np.float64)
+        # Rows come grouped by symbol; split them where the symbol changes
+        symbol_column = np.array(symbol_column)
+        starts = np.flatnonzero(np.r_[True, symbol_column[1:] != symbol_column[:-1]])
+        ends = np.append(starts[1:], len(rows))
+        return {
+            str(symbol_column[start]): pd.Series(
+                close[start:end],
+                index=pd.DatetimeIndex(ts[start:end], name='date'),
+                name='close'
+            )
+            for start, end in zip(starts, ends)
+        }
+    
+    def _write_file_cache(self, symbol: str, price_series: pd.Series) -> None:
+        """
+        Merge freshly fetched closes into a symbol's persistent cache rows
+        
+        The fetched rows are authoritative from their first date on; older cached
+        rows are kept only if the cache overlaps the new rows (so the cached history
+        stays contiguous). The merge is one transaction, so concurrent readers see
+        either the old or the new history.
+        
+        Args:
+            symbol: Asset symbol
+            price_series: Close price series indexed by date
+        """
+        if len(price_series) == 0:
+            return
+        if not price_series.index.is_monotonic_increasing:
+            price_series = price_series.sort_index()
+        ts = price_series.index.as_unit('ms').asi8
+        rows = zip([symbol] * len(ts), ts.tolist(), price_series.to_numpy(dtype=float).tolist())
+        
+        with self._cache_db_lock:
+            db = self._cache_db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                last_ts = db.execute("SELECT MAX(ts) FROM prices WHERE symbol = ?", (symbol,)).fetchone()[0]
+                if last_ts is not None and last_ts >= ts[0]:
+                    db.execute("DELETE FROM prices WHERE symbol = ? AND ts >= ?", (symbol, int(ts[0])))
+                else:
+                    db.execute("DELETE FROM prices WHERE symbol = ?", (symbol,))
+                db.executemany("INSERT OR REPLACE INTO prices(symbol, ts, close) VALUES (?, ?, ?)", rows)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+    
     def get_price_series(self, symbol: str, days: int = 365, db: Optional[Session] = None) -> pd.Series:
         """
         Get closing price series for a symbol with caching and rate limiting
@@ -368,10 +907,10 @@ class DataLoader:
             db: Database session
             
         Returns:
-            Series with dates as index and prices as values
+            Series with dates as index and prices as values (read-only when served
+            from the in-memory cache; copy it before writing to it)
         """
         cache_key = f"{symbol}_{days}"
-        cache_file = self._cache_dir / f"{cache_key.replace('/', '_')}.pkl"
         
         # 0. Quick check: if we know this symbol has insufficient data, return early
         if symbol in self._insufficient_data_symbols:
@@ -381,145 +920,141 @@ class DataLoader:
                 # This prevents repeated API calls for symbols we know don't have enough data
                 return pd.Series(dtype=float)
         
-        # 1. Check in-memory cache first (fastest)
-        with self._cache_lock:
-            if cache_key in self._price_cache:
-                cached_series = self._price_cache[cache_key]
-                if len(cached_series) >= days * 0.8:  # At least 80% of requested days
-                    return cached_series.copy()
-                # Remove from cache if insufficient data
-                del self._price_cache[cache_key]
-        
-        # 2. Get lock for this specific symbol/days to prevent duplicate requests
-        with self._fetching_locks_lock:
-            if cache_key not in self._fetching_locks:
-                self._fetching_locks[cache_key] = threading.Lock()
-            fetch_lock = self._fetching_locks[cache_key]
-        
-        # 3. Acquire lock for this specific symbol/days combination
-        with fetch_lock:
-            # Double-check cache after acquiring lock (another thread might have loaded it)
-            with self._cache_lock:
-                if cache_key in self._price_cache:
-                    cached_series = self._price_cache[cache_key]
-                    if len(cached_series) >= days * 0.8:  # At least 80% of requested days
-                        return cached_series.copy()
-            # Double-check cache after acquiring lock (another thread might have loaded it)
-            with self._cache_lock:
-                if cache_key in self._price_cache:
-                    cached_series = self._price_cache[cache_key]
-                    if len(cached_series) >= days * 0.8:
-                        return cached_series.copy()
+        # 1. Check in-memory cache first (fastest, no lock)
+        cached_series = self._cache_get(cache_key)
+        if cached_series is not None:
+            if len(cached_series) >= days * 0.8:  # At least 80% of requested days
+                return cached_series
+            # Remove from cache if insufficient data
+            self._cache_drop(lambda key: key == cache_key)
+        
+        # 2. Join an in-flight load of this symbol/days, or start one
+        with self._fetching_lock:
+            future = self._fetching_futures.get(cache_key)
+            is_loader = future is None
+            if is_loader:
+                future = Future()
+                self._fetching_futures[cache_key] = future
+        if not is_loader:
+            # Another thread is loading it: share its result (a private copy, like
+            # the loading caller's own)
+            return future.result().copy()
+        
+        # 3. Load from the persistent cache or the API, then release waiters
+        try:
+            price_series = self._load_price_series(symbol, days, db)
+            future.set_result(price_series)
+            return price_series
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._fetching_lock:
+                del self._fetching_futures[cache_key]
+    
+    def _load_price_series(self, symbol: str, days: int, db: Optional[Session]) -> pd.Series:
+        """
+        Load a closing price series from the persistent cache or the API (see get_price_series)
+        
+        Args:
+            symbol: Asset symbol
+            days: Number of days
+            db: Database session
             
-            # 4. Check file cache (persistent across restarts)
-            if cache_file.exists():
-                try:
-                    with open(cache_file, 'rb') as f:
-                        price_series = pickle.load(f)
-                    
-                    if len(price_series) >= days * 0.8:
-                        # Load into memory cache for faster access
-                        with self._cache_lock:
-                            self._price_cache[cache_key] = price_series.copy()
-                            # Limit cache size
-                            if len(self._price_cache) > 200:
-                                oldest_key = next(iter(self._price_cache))
-                                del self._price_cache[oldest_key]
-                        return price_series
-                    else:
-                        # Delete cache file if insufficient data
-                        try:
-                            cache_file.unlink()
-                        except Exception:
-                            pass
-                except Exception:
-                    # If file is corrupted, delete it
-                    try:
-                        cache_file.unlink()
-                    except Exception:
-                        pass
+        Returns:
+            Series with dates as index and prices as values
+        """
+        cache_key = f"{symbol}_{days}"
+        # Check memory cache again (it may have been filled since get_price_series looked)
+        cached_series = self._cache_get(cache_key)
+        if cached_series is not None and len(cached_series) >= days * 0.8:
+            return cached_series
+        
+        # 4. Check persistent cache (survives restarts); each symbol holds the
+        # longest horizon fetched so far, sliced to the requested days
+        try:
+            price_series = self._read_file_cache(symbol, days)
             
-            # 5. Fetch from API (with rate limiting)
-            with self._request_lock:
-                current_time = time.time()
-                time_since_last = current_time - self._last_request_time
-                if time_since_last < self._min_request_interval:
-                    time.sleep(self._min_request_interval - time_since_last)
+            if price_series is not None and len(price_series) >= days * 0.8:
+                # Load into memory cache for faster access
+                self._cache_put({cache_key: price_series})
+                return price_series
+            # Missing or too short for this horizon: fetched below and merged in
+        except Exception:
+            # Unreadable cache is not critical, fetch from the API instead
+            pass
+        
+        # 5. Fetch from API (with rate limiting)
+        with self._request_lock:
+            current_time = time.time()
+            time_since_last = current_time - self._last_request_time
+            if time_since_last < self._min_request_interval:
+                time.sleep(self._min_request_interval - time_since_last)
+            
+            try:
+                # Log the request
+                print(f"Fetching {days} days of data for {symbol}...")
+                df = self.fetch_ohlcv(symbol, days, db)
+                self._last_request_time = time.time()
                 
-                try:
-                    # Log the request
-                    print(f"Fetching {days} days of data for {symbol}...")
-                    df = self.fetch_ohlcv(symbol, days, db)
-                    self._last_request_time = time.time()
-                    
-                    if df.empty:
-                        print(f"⚠️  Warning: No data returned from API for {symbol}")
-                        # Try to return from file cache even if API failed
-                        if cache_file.exists():
-                            try:
-                                with open(cache_file, 'rb') as f:
-                                    price_series = pickle.load(f)
-                                print(f"  → Using cached data for {symbol}: {len(price_series)} days (requested {days})")
-                                return price_series
-                            except Exception:
-                                pass
-                        # Mark as failed
-                        self._insufficient_data_symbols[symbol] = 0
-                        return pd.Series(dtype=float)
-                    
-                    price_series = df['close']
-                    days_received = len(price_series)
-                    
-                    # Verify we got enough data
-                    if days_received < days * 0.8:
-                        print(f"⚠️  Warning: Only got {days_received} days of data for {symbol}, requested {days} days")
-                        print(f"  → Possible reasons: asset recently listed, API error, or insufficient historical data")
-                        # Cache this to avoid repeated requests
-                        self._insufficient_data_symbols[symbol] = days_received
-                        # Still return the data we have (might be useful for some pairs)
-                    elif days_received < days:
-                        print(f"  ✓ Got {days_received} days for {symbol} (requested {days}, missing {days - days_received} days)")
-                    else:
-                        print(f"  ✓ Successfully fetched {days_received} days of data for {symbol}")
-                    
-                    # 6. Save to file cache (persistent)
+                if df.empty:
+                    print(f"⚠️  Warning: No data returned from API for {symbol}")
+                    # Try to return from file cache even if API failed
                     try:
-                        with open(cache_file, 'wb') as f:
-                            pickle.dump(price_series, f)
+                        price_series = self._read_file_cache(symbol, days)
+                        if price_series is not None:
+                            print(f"  → Using cached data for {symbol}: {len(price_series)} days (requested {days})")
+                            return price_series
                     except Exception:
-                        # Non-critical if file cache fails
                         pass
-                    
-                    # 7. Cache in memory
-                    with self._cache_lock:
-                        self._price_cache[cache_key] = price_series.copy()
-                        # Limit cache size to prevent memory issues
-                        if len(self._price_cache) > 200:
-                            # Remove oldest entries (simple FIFO)
-                            oldest_key = next(iter(self._price_cache))
-                            del self._price_cache[oldest_key]
-                    
-                    return price_series
-                except Exception as e:
-                    print(f"Error loading price series for {symbol}: {e}")
-                    # Try to return from file cache even if API failed
-                    if cache_file.exists():
-                        try:
-                            with open(cache_file, 'rb') as f:
-                                price_series = pickle.load(f)
-                            print(f"Using cached data for {symbol}: {len(price_series)} days (requested {days})")
-                            return price_series
-                        except Exception:
-                            pass
-                    
-                    # Return cached data from memory if available
-                    with self._cache_lock:
-                        if cache_key in self._price_cache:
-                            cached = self._price_cache[cache_key].copy()
-                            print(f"Using in-memory cache for {symbol}: {len(cached)} days (requested {days})")
-                            return cached
-                    
+                    # Mark as failed (retried on the next call, unlike a short history)
+                    self._mark_failed(symbol)
                     return pd.Series(dtype=float)
+                
+                price_series = df['close']
+                days_received = len(price_series)
+                
+                # Verify we got enough data
+                if days_received < days * 0.8:
+                    print(f"⚠️  Warning: Only got {days_received} days of data for {symbol}, requested {days} days")
+                    print(f"  → Possible reasons: asset recently listed, API error, or insufficient historical data")
+                    # Cache this to avoid repeated requests
+                    self._mark_insufficient(symbol, days_received)
+                    # Still return the data we have (might be useful for some pairs)
+                elif days_received < days:
+                    print(f"  ✓ Got {days_received} days for {symbol} (requested {days}, missing {days - days_received} days)")
+                else:
+                    print(f"  ✓ Successfully fetched {days_received} days of data for {symbol}")
+                
+                # 6. Save to file cache (persistent)
+                try:
+                    self._write_file_cache(symbol, price_series)
+                except Exception:
+                    # Non-critical if file cache fails
+                    pass
+                
+                # 7. Cache in memory
+                self._cache_put({cache_key: price_series})
+                
+                return price_series
+            except Exception as e:
+                print(f"Error loading price series for {symbol}: {e}")
+                # Try to return from file cache even if API failed
+                try:
+                    price_series = self._read_file_cache(symbol, days)
+                    if price_series is not None:
+                        print(f"Using cached data for {symbol}: {len(price_series)} days (requested {days})")
+                        return price_series
+                except Exception:
+                    pass
+                
+                # Return cached data from memory if available
+                cached = self._cache_get(cache_key)
+                if cached is not None:
+                    print(f"Using in-memory cache for {symbol}: {len(cached)} days (requested {days})")
+                    return cached
+                
+                return pd.Series(dtype=float)
     
     def clear_cache(self, symbol: Optional[str] = None, days: Optional[int] = None):
         """
@@ -530,57 +1065,45 @@ class DataLoader:
             days: Number of days to clear (None = all days)
         """
         # Clear in-memory cache
-        with self._cache_lock:
-            if symbol and days:
-                # Clear specific cache entry
-                cache_key = f"{symbol}_{days}"
-                if cache_key in self._price_cache:
-                    del self._price_cache[cache_key]
-            elif symbol:
-                # Clear all entries for this symbol
-                keys_to_remove = [k for k in self._price_cache.keys() if k.startswith(f"{symbol}_")]
-                for key in keys_to_remove:
-                    del self._price_cache[key]
-            elif days:
-                # Clear all entries for this days value
-                keys_to_remove = [k for k in self._price_cache.keys() if k.endswith(f"_{days}")]
-                for key in keys_to_remove:
-                    del self._price_cache[key]
-            else:
-                # Clear all cache
-                self._price_cache.clear()
-        
-        # Clear file cache
         if symbol and days:
-            # Clear specific file
-            cache_key = f"{symbol}_{days}"
-            cache_file = self._cache_dir / f"{cache_key.replace('/', '_')}.pkl"
-            if cache_file.exists():
-                try:
-                    cache_file.unlink()
-                except Exception:
-                    pass
+            # Clear specific cache entry
+            self._cache_drop(lambda key: key == f"{symbol}_{days}")
         elif symbol:
-            # Clear all files for this symbol
-            pattern = f"{symbol.replace('/', '_')}_*.pkl"
-            for cache_file in self._cache_dir.glob(pattern):
-                try:
-                    cache_file.unlink()
-                except Exception:
-                    pass
+            # Clear all entries for this symbol
+            self._cache_drop(lambda key: key.startswith(f"{symbol}_"))
         elif days:
-            # Clear all files for this days value
-            pattern = f"*_{days}.pkl"
-            for cache_file in self._cache_dir.glob(pattern):
-                try:
-                    cache_file.unlink()
-                except Exception:
-                    pass
+            # Clear all entries for this days value
+            self._cache_drop(lambda key: key.endswith(f"_{days}"))
         else:
-            # Clear all cache files
-            for cache_file in self._cache_dir.glob("*.pkl"):
-                try:
-                    cache_file.unlink()
-                except Exception:
-                    pass
-
+            # Clear all cache
+            with self._cache_lock:
+                self._price_cache = {}
+                self._cache_last_used = {}
+        
+        # Clear persistent cache (one history per symbol, covering every horizon, so
+        # clearing a horizon drops the histories that may hold it)
+        try:
+            with self._cache_db_lock:
+                if symbol:
+                    self._cache_db.execute("DELETE FROM prices WHERE symbol = ?", (symbol,))
+                else:
+                    self._cache_db.execute("DELETE FROM prices")
+        except Exception:
+            pass
+        
+        # Forget per-symbol fetch outcomes along with the histories they describe, so
+        # this bookkeeping never outlives the cache (and a cleared symbol is refetched)
+        if symbol:
+            self._insufficient_data_symbols.pop(symbol, None)
+            self._failed_symbols.discard(symbol)
+        else:
+            self._insufficient_data_symbols.clear()
+            self._failed_symbols.clear()
+        try:
+            with self._cache_db_lock:
+                if symbol:
+                    self._cache_db.execute("DELETE FROM symbol_status WHERE symbol = ?", (symbol,))
+                else:
+                    self._cache_db.execute("DELETE FROM symbol_status")
+        except Exception:
+            pass
@@ -1,9 +1,35 @@
 """
 Hurst exponent calculation for mean reversion detection
 """
+from functools import lru_cache
 import numpy as np
 import pandas as pd
-from typing import Optional
+from typing import Dict, List, Optional, Union
+
+from ._kernels import ghe_k_values, ghe_k_values_batch
+
+
+@lru_cache(maxsize=8)
+def _log_tau_slope_weights(n_tau: int) -> np.ndarray:
+    """
+    Weights that turn log(K) over tau = 1..n_tau into the log-log regression slope
+    
+    The slope row of the pseudoinverse of the [log(tau), 1] design matrix, in closed
+    form: (log(tau) - mean) / sum((log(tau) - mean)^2). The lag count is fixed by
+    max_lags and the series length, so one entry serves a whole screening run.
+    Both axes use base-2 logs: the ln(2) factors cancel in the slope.
+    
+    Args:
+        n_tau: Number of lags
+        
+    Returns:
+        Read-only array of n_tau weights
+    """
+    log_tau = np.log2(np.arange(1, n_tau + 1))
+    centered = log_tau - log_tau.mean()
+    weights = centered / np.dot(centered, centered)
+    weights.flags.writeable = False
+    return weights
 
 
 class HurstCalculator:
@@ -11,7 +37,7 @@ class HurstCalculator:
     
     @staticmethod
     def generalized_hurst_exponent(
-        series: pd.Series,
+        series: Union[pd.Series, np.ndarray],
         max_lags: int = 50,
         q: int = 1
     ) -> Optional[float]:
@@ -19,7 +45,7 @@ class HurstCalculator:
         Calculate generalized Hurst exponent (GHE)
         
         Args:
-            series: Time series (typically spread)
+            series: Time series (typically spread), as a Series or array
             max_lags: Maximum lag for calculation
             q: Moment order (q=1 for standard Hurst)
             
@@ -30,7 +56,8 @@ class HurstCalculator:
             return None
         
         # Remove NaN
-        series_clean = series.dropna().values
+        series_clean = np.asarray(series, dtype=float)
+        series_clean = series_clean[~np.isnan(series_clean)]
         
         if len(series_clean) < max_lags * 2:
             return None
@@ -42,35 +69,95 @@ class HurstCalculator:
             return None
         
         tau_values = np.arange(1, min(max_lags, len(increments) // 2))
-        k_values = []
         
-        for tau in tau_values:
-            if tau >= len(increments):
-                break
-            
-            # Calculate K_q(tau)
-            diff_tau = increments[tau:] - increments[:-tau]
-            numerator = np.mean(np.abs(diff_tau) ** q)
-            denominator = np.mean(np.abs(increments) ** q)
-            
-            if denominator == 0:
-                continue
-            
-            k = numerator / denominator
-            k_values.append(k)
+        # Calculate K_q(tau) for every lag in one compiled pass
+        k_values = ghe_k_values(increments, len(tau_values), float(q))
         
-        if len(k_values) < 5:  # Need minimum points for regression
+        # Need minimum points for regression (none at all for flat increments)
+        if len(k_values) < 5 or np.isnan(k_values[0]):
             return None
         
-        # Log-log regression: log(K) = q*H*log(tau) + C
-        log_tau = np.log(tau_values[:len(k_values)])
-        log_k = np.log(np.array(k_values) + 1e-10)  # Add small value to avoid log(0)
-        
-        # Linear regression
-        try:
-            slope, _ = np.polyfit(log_tau, log_k, 1)
-            h_exponent = slope / q
-            return h_exponent
-        except:
-            return None
+        # Log-log regression: log(K) = q*H*log(tau) + C, slope from cached weights
+        log_k = np.log2(k_values + 1e-10)  # Add small value to avoid log(0); base cancels in the slope
+        slope = np.dot(_log_tau_slope_weights(len(k_values)), log_k)
+        h_exponent = slope / q
+        return h_exponent
 
+    
+    @staticmethod
+    def batch_ghe(
+        spreads_2d: np.ndarray,
+        max_lags: int = 50,
+        q: int = 1
+    ) -> np.ndarray:
+        """
+        Calculate the generalized Hurst exponent of many equal-length series at once
+        
+        Same estimate as generalized_hurst_exponent for each row, but the log-log
+        regressions of all rows are solved together with one matrix product.
+        
+        Args:
+            spreads_2d: Array of shape (n_series, n_samples), free of NaN
+            max_lags: Maximum lag for calculation
+            q: Moment order (q=1 for standard Hurst)
+            
+        Returns:
+            Array of Hurst exponents, one per row (NaN where it is undefined)
+        """
+        spreads_2d = np.asarray(spreads_2d, dtype=float)
+        n_series, n_samples = spreads_2d.shape
+        hurst = np.full(n_series, np.nan)
+        
+        n_increments = n_samples - 1
+        if n_samples < max_lags * 2 or n_increments < max_lags:
+            return hurst
+        n_tau = min(max_lags, n_increments // 2) - 1
+        if n_tau < 5:  # Need minimum points for regression
+            return hurst
+        
+        # K_q(tau) of every row in one compiled call, rows spread over cores
+        k_values = ghe_k_values_batch(np.diff(spreads_2d, axis=1), n_tau, float(q))
+        valid = ~np.isnan(k_values[:, 0])  # Flat increments have no usable lag
+        if not valid.any():
+            return hurst
+        
+        # Log-log regression for every row: log(K) = q*H*log(tau) + C
+        hurst[valid] = np.log2(k_values[valid] + 1e-10) @ _log_tau_slope_weights(n_tau) / q
+        return hurst
+    
+    @classmethod
+    def generalized_hurst_exponents(
+        cls,
+        series_list: List[Union[pd.Series, np.ndarray]],
+        max_lags: int = 50,
+        q: int = 1
+    ) -> List[Optional[float]]:
+        """
+        Calculate generalized Hurst exponents of many series
+        
+        Series are cleaned of NaN and grouped by length, and each group is stacked
+        into one batch_ghe call.
+        
+        Args:
+            series_list: Time series (typically spreads), as Series or arrays
+            max_lags: Maximum lag for calculation
+            q: Moment order (q=1 for standard Hurst)
+            
+        Returns:
+            Hurst exponent per series, in order (None where it is undefined)
+        """
+        cleaned = []
+        for series in series_list:
+            values = np.asarray(series, dtype=float)
+            cleaned.append(values[~np.isnan(values)])
+        
+        by_length: Dict[int, List[int]] = {}
+        for i, values in enumerate(cleaned):
+            by_length.setdefault(len(values), []).append(i)
+        
+        hurst_values: List[Optional[float]] = [None] * len(cleaned)
+        for positions in by_length.values():
+            batch = cls.batch_ghe(np.stack([cleaned[i] for i in positions]), max_lags, q)
+            for i, value in zip(positions, batch):
+                hurst_values[i] = None if np.isnan(value) else float(value)
+        return hurst_values
@@ -4,7 +4,7 @@ Stores results in memory for real-time access
 """
 import threading
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, Dict, Tuple
 import time
 import logging
 
@@ -33,14 +33,16 @@ class LiveScreener:
         )
         self._thread: Optional[threading.Thread] = None
         
-        # In-memory storage for results
-        self.current_results: List[Dict] = []
+        # In-memory storage for results; each of these is an immutable snapshot that is
+        # swapped as a whole on update, so readers can share it without copying
+        self.current_results: Tuple[Dict, ...] = ()
         self.last_session_info: Optional[Dict] = None
         self._lock = threading.Lock()  # Thread-safe access to results
         
         # History storage (keep last 100 sessions for trend analysis)
-        self.results_history: List[Dict] = []
+        self.results_history: Tuple[Dict, ...] = ()
         self.max_history_size = 100
+        self._history_fingerprint: Optional[int] = None  # Fingerprint of the newest history entry
     
     def start(self):
         """Start the live screener"""
@@ -58,15 +60,15 @@ class LiveScreener:
         if self._thread:
             self._thread.join(timeout=5)
     
-    def get_results(self) -> List[Dict]:
-        """Get current screening results (thread-safe)"""
+    def get_results(self) -> Tuple[Dict, ...]:
+        """Get current screening results (thread-safe shared snapshot, do not mutate)"""
         with self._lock:
-            return self.current_results.copy()
+            return self.current_results
     
     def get_last_session(self) -> Optional[Dict]:
-        """Get last session info"""
+        """Get last session info (shared snapshot, do not mutate)"""
         with self._lock:
-            return self.last_session_info.copy() if self.last_session_info else None
+            return self.last_session_info
     
     def get_status(self) -> Dict:
         """Get current screener status"""
@@ -152,17 +154,23 @@ class LiveScreener:
             
             # Update in-memory storage (thread-safe)
             with self._lock:
-                # Save to history before updating
+                # Save to history before updating (the snapshot is shared, not copied)
                 if self.current_results:
-                    self.results_history.append({
+                    entry = {
                         'timestamp': start_time.isoformat(),
-                        'results': self.current_results.copy()
-                    })
-                    # Keep only last N sessions
-                    if len(self.results_history) > self.max_history_size:
-                        self.results_history = self.results_history[-self.max_history_size:]
+                        'results': self.current_results
+                    }
+                    fingerprint = self._results_fingerprint(self.current_results)
+                    if self.results_history and fingerprint == self._history_fingerprint:
+                        # Same pairs as the newest entry: refresh its timestamp instead of
+                        # appending a near-identical snapshot
+                        self.results_history = self.results_history[:-1] + (entry,)
+                    else:
+                        # Keep only last N sessions
+                        self.results_history = (self.results_history + (entry,))[-self.max_history_size:]
+                    self._history_fingerprint = fingerprint
                 
-                self.current_results = results
+                self.current_results = tuple(results)
                 self.last_screening_time = datetime.utcnow()
                 
                 # Create session info
@@ -199,10 +207,26 @@ class LiveScreener:
             with self._lock:
                 self.is_running = False
     
-    def get_history(self) -> List[Dict]:
-        """Get screening history (thread-safe)"""
+    @staticmethod
+    def _results_fingerprint(results: Tuple[Dict, ...]) -> int:
+        """
+        Cheap fingerprint of a results snapshot: the pairs and their rounded correlations
+        
+        Args:
+            results: Screening results
+            
+        Returns:
+            Hash that is equal for snapshots with the same pairs and correlations
+        """
+        return hash(tuple(
+            (r.get('asset_a'), r.get('asset_b'), round(r.get('correlation', 0.0), 4))
+            for r in results
+        ))
+    
+    def get_history(self) -> Tuple[Dict, ...]:
+        """Get screening history (thread-safe shared snapshot, do not mutate)"""
         with self._lock:
-            return self.results_history.copy()
+            return self.results_history
 
 
 # Global live screener instance
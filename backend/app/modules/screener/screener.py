@@ -2,21 +2,253 @@
 Main screener module that coordinates pair screening
 """
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Optional, Dict
+import multiprocessing
+import os
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Dict, Tuple
 from sqlalchemy.orm import Session
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import logging
 
+from app.modules.screener._kernels import warm_up_kernels
 from app.modules.screener.data_loader import DataLoader
 from app.modules.screener.cointegration import CointegrationTester
-from app.modules.screener.correlation import CorrelationAnalyzer
+from app.modules.screener.correlation import AssetStatsCache, CorrelationAnalyzer, align_prices
 from app.modules.screener.hurst import HurstCalculator
 from app.modules.shared.models import ScreeningConfig, PairInfo
 
 logger = logging.getLogger(__name__)
 
+# Complete-history pairs are tested in worker processes (the cointegration tests are
+# CPU-bound and threads share the GIL) once there are enough of them to pay for it
+PROCESS_POOL_MIN_PAIRS = 500
+PROCESS_POOL_WORKERS = min(8, os.cpu_count() or 1)
+
+# Largest rounding error of the float32 pre-filter correlation matrix that is allowed for
+# (float32 correlations of daily returns are off by ~1e-6)
+FLOAT32_CORRELATION_MARGIN = 1e-4
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+@dataclass(frozen=True, slots=True)
+class PairTestSettings:
+    """
+    Plain values read by every pair test, unpacked once from ScreeningConfig
+    
+    Keeps pydantic attribute access (and the threshold arithmetic) out of the
+    per-pair path; a slotted frozen dataclass is also cheap to send to workers.
+    
+    Attributes:
+        lookback_days: Days of history per asset
+        min_correlation: Final strict correlation threshold
+        quick_filter_threshold: Correlation below which a pair is rejected before
+            the cointegration test
+    """
+    lookback_days: int
+    min_correlation: float
+    quick_filter_threshold: float
+    
+    @classmethod
+    def from_config(cls, config: ScreeningConfig) -> 'PairTestSettings':
+        """
+        Unpack the pair test settings of a screening configuration
+        
+        Args:
+            config: Screening configuration
+            
+        Returns:
+            PairTestSettings for the screening
+        """
+        return cls(
+            lookback_days=config.lookback_days,
+            min_correlation=config.min_correlation,
+            quick_filter_threshold=PairsScreener._quick_filter_threshold(config)
+        )
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared worker process pool, starting it on first use
+    
+    Workers are spawned rather than forked, which is safe next to the server's
+    threads; the pool is kept for later screenings so they skip the startup.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _process_pool
+
+
+def _discard_process_pool() -> None:
+    """Shut down the shared worker process pool (e.g. after a worker died)"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+
+def _test_aligned_pair(
+    asset_a: str,
+    asset_b: str,
+    values_a: np.ndarray,
+    values_b: np.ndarray,
+    correlation: Tuple[float, float, float],
+    settings: PairTestSettings
+) -> Optional[Tuple[Dict, np.ndarray]]:
+    """
+    Cointegration part of the pair test, on prices that are already aligned
+    
+    Args:
+        asset_a: First asset symbol
+        asset_b: Second asset symbol
+        values_a: Prices of asset A, NaN-free and aligned with values_b
+        values_b: Prices of asset B, NaN-free and aligned with values_a
+        correlation: Tuple of (correlation, min_correlation, max_correlation)
+        settings: Pair test settings of the screening
+        
+    Returns:
+        Tuple of (dictionary with test results, spread) or None if pair is invalid
+    """
+    corr, min_corr, max_corr = correlation
+    
+    # Quick pre-filter: reject pairs with very low correlation (not too strict)
+    if corr < settings.quick_filter_threshold:
+        return None  # Fast rejection before expensive cointegration test
+    
+    # Now do the expensive cointegration test (only for pairs with good correlation);
+    # the fused test also returns the intercept and the spread it tested
+    fused = CointegrationTester.engle_granger_fused(values_a, values_b)
+    return _pair_outcome(asset_a, asset_b, correlation, fused, settings)
+
+
+def _pair_outcome(
+    asset_a: str,
+    asset_b: str,
+    correlation: Tuple[float, float, float],
+    fused: Optional[Tuple[bool, float, float, float, float, float, np.ndarray]],
+    settings: PairTestSettings
+) -> Optional[Tuple[Dict, np.ndarray]]:
+    """
+    Turn a pair's Engle-Granger result into its screening result
+    
+    Args:
+        asset_a: First asset symbol
+        asset_b: Second asset symbol
+        correlation: Tuple of (correlation, min_correlation, max_correlation)
+        fused: engle_granger_fused result of the pair (None if it could not be tested)
+        settings: Pair test settings of the screening
+        
+    Returns:
+        Tuple of (dictionary with test results, spread) or None if pair is invalid
+    """
+    if fused is None:
+        return None
+    corr, min_corr, max_corr = correlation
+    is_cointegrated, beta, alpha, adf_stat, adf_pvalue, spread_std, spread = fused
+    
+    if not is_cointegrated:
+        return None
+    
+    # Final strict correlation check
+    if corr < settings.min_correlation:
+        return None
+    
+    # Spread mean and current z-score in one fused pass
+    mean_spread, current_zscore = CointegrationTester.current_zscore_fast(spread)
+    
+    result = {
+        'asset_a': asset_a,
+        'asset_b': asset_b,
+        'correlation': corr,
+        'min_correlation': min_corr,
+        'max_correlation': max_corr,
+        'adf_pvalue': adf_pvalue,
+        'adf_statistic': adf_stat,
+        'beta': beta,
+        'spread_std': spread_std,
+        'mean_spread': mean_spread,
+        'current_zscore': current_zscore
+    }
+    
+    return result, spread
+
+
+def _test_matrix_pairs(
+    matrix_assets: List[str],
+    price_rows: np.ndarray,
+    pairs: List[Tuple[int, int, float]],
+    settings: PairTestSettings
+) -> List[Optional[Tuple[Dict, np.ndarray]]]:
+    """
+    Test complete-history pairs together, with batched regressions and ADF pre-tests
+    
+    Args:
+        matrix_assets: Asset symbol of each price row
+        price_rows: Prices (assets x dates) on the common dates
+        pairs: (row A, row B, precomputed correlation) of each pair to test; every pair
+            already passed the correlation pre-filter
+        settings: Pair test settings of the screening
+        
+    Returns:
+        Outcome of each pair, in order (None if the pair is invalid)
+    """
+    if not pairs:
+        return []
+    rows_a, rows_b, correlations = zip(*pairs)
+    fused_results = CointegrationTester.engle_granger_rows(price_rows, np.array(rows_a), np.array(rows_b))
+    
+    outcomes = []
+    for row_a, row_b, corr, fused in zip(rows_a, rows_b, correlations, fused_results):
+        asset_a, asset_b = matrix_assets[row_a], matrix_assets[row_b]
+        try:
+            outcomes.append(_pair_outcome(asset_a, asset_b, (corr, corr, corr), fused, settings))
+        except Exception as e:
+            logger.error(f"Error testing pair {asset_a}-{asset_b}: {e}")
+            outcomes.append(None)
+    return outcomes
+
+
+def _test_pairs_worker(
+    shared_name: str,
+    shape: Tuple[int, int],
+    matrix_assets: List[str],
+    pairs: List[Tuple[int, int, float]],
+    settings: PairTestSettings
+) -> List[Optional[Tuple[Dict, np.ndarray]]]:
+    """
+    Test a chunk of complete-history pairs inside a worker process
+    
+    Args:
+        shared_name: Name of the shared memory block holding the price rows
+        shape: Shape of the price rows (assets x dates)
+        matrix_assets: Asset symbol of each price row
+        pairs: (row A, row B, precomputed correlation) of each pair to test
+        settings: Pair test settings of the screening
+        
+    Returns:
+        Outcome of each pair, in order (None if the pair is invalid)
+    """
+    shared = SharedMemory(name=shared_name)
+    try:
+        price_rows = np.ndarray(shape, dtype=np.float64, buffer=shared.buf)
+        outcomes = _test_matrix_pairs(matrix_assets, price_rows, pairs, settings)
+        del price_rows  # Release the view before unmapping the block
+        return outcomes
+    finally:
+        shared.close()
+
 
 class PairsScreener:
     """Main screener for finding cointegrated pairs"""
@@ -27,6 +259,8 @@ class PairsScreener:
         self.cointegration_tester = CointegrationTester()
         self.correlation_analyzer = CorrelationAnalyzer()
         self.hurst_calculator = HurstCalculator()
+        # Compile the numba kernels here rather than in the first worker threads
+        warm_up_kernels()
     
     def screen_pairs(
         self,
@@ -65,34 +299,24 @@ class PairsScreener:
         logger.info(f"Step 2: Checking data availability for {len(assets)} assets (requested: {config.lookback_days} days)")
         min_required_days = int(config.lookback_days * 0.8)  # At least 80% of requested days
         
+        # One bulk load: cached histories in one query, the rest fetched concurrently
+        try:
+            prices = self.data_loader.get_price_series_many(assets, config.lookback_days, self.db)
+        except Exception as e:
+            logger.error(f"Failed to load price data - {e}")
+            prices = pd.DataFrame()
+        days_available_per_asset = prices.count()
+        
+        # Check each asset's data availability
         valid_assets = []
-        preload_workers = min(4, len(assets))
-        with ThreadPoolExecutor(max_workers=preload_workers) as preload_executor:
-            preload_futures = {
-                asset: preload_executor.submit(
-                    self.data_loader.get_price_series,
-                    asset,
-                    config.lookback_days,
-                    self.db
-                )
-                for asset in assets
-            }
-            
-            # Check each asset's data availability
-            for asset, future in preload_futures.items():
-                try:
-                    price_series = future.result(timeout=60)
-                    days_available = len(price_series)
-                    
-                    if days_available >= min_required_days:
-                        valid_assets.append(asset)
-                        if days_available < config.lookback_days:
-                            logger.debug(f"{asset}: {days_available} days available (requested {config.lookback_days}, using {days_available})")
-                    else:
-                        logger.debug(f"{asset}: Only {days_available} days available (need at least {min_required_days}), removing from screening")
-                except Exception as e:
-                    logger.warning(f"{asset}: Failed to load data - {e}, removing from screening")
-                    continue
+        for asset in assets:
+            days_available = int(days_available_per_asset.get(asset, 0))
+            if days_available >= min_required_days:
+                valid_assets.append(asset)
+                if days_available < config.lookback_days:
+                    logger.debug(f"{asset}: {days_available} days available (requested {config.lookback_days}, using {days_available})")
+            else:
+                logger.debug(f"{asset}: Only {days_available} days available (need at least {min_required_days}), removing from screening")
         
         logger.info(f"Step 3: {len(valid_assets)} assets have sufficient data, {len(assets) - len(valid_assets)} removed")
         
@@ -100,63 +324,159 @@ class PairsScreener:
             logger.error("Need at least 2 assets with sufficient data to form pairs")
             return []
         
-        # Step 4: Generate pairs only from valid assets
-        pairs = []
-        for i, asset_a in enumerate(valid_assets):
-            for asset_b in valid_assets[i+1:]:
-                pairs.append((asset_a, asset_b))
+        # Full-period correlations of every asset with a complete history, from one matrix,
+        # plus their prices / return statistics, computed once instead of once per pair
+        corr_matrix, corr_position, asset_stats = self._precompute_correlations(
+            prices[valid_assets].dropna(how='all')
+        )
+        # Each asset's loaded history as a float64 row on the shared date index (NaN where
+        # missing), for pairs that cannot use the cached stats
+        asset_prices = {}
+        if len(asset_stats) < len(valid_assets):
+            price_rows = np.ascontiguousarray(prices[valid_assets].to_numpy(dtype=np.float64).T)
+            asset_prices = {asset: price_rows[i] for i, asset in enumerate(valid_assets)}
         
-        logger.info(f"Step 4: Generated {len(pairs)} pairs from {len(valid_assets)} valid assets")
+        # Step 4: Generate pairs only from valid assets, as index arrays (i < j)
+        index_a, index_b = np.triu_indices(len(valid_assets), k=1)
+        n_pairs = len(index_a)
+        
+        logger.info(f"Step 4: Generated {n_pairs} pairs from {len(valid_assets)} valid assets")
+        
+        # Correlation pre-filter for every pair covered by the (float32) matrix in one vectorized
+        # step, widened by its rounding margin; surviving pairs get their reported correlation in
+        # float64 from the cached returns and are gated on that. The other pairs are checked
+        # inside _test_pair
+        settings = PairTestSettings.from_config(config)
+        quick_filter_threshold = settings.quick_filter_threshold
+        matrix_position = np.array([corr_position.get(asset, -1) for asset in valid_assets])
+        position_a, position_b = matrix_position[index_a], matrix_position[index_b]
+        pair_correlation = np.full(n_pairs, np.nan)
+        in_matrix = (position_a >= 0) & (position_b >= 0)
+        pair_correlation[in_matrix] = corr_matrix[position_a[in_matrix], position_b[in_matrix]]
+        candidate = in_matrix & (pair_correlation >= quick_filter_threshold - FLOAT32_CORRELATION_MARGIN)
+        for k in np.flatnonzero(candidate).tolist():
+            pair_correlation[k] = self.correlation_analyzer.correlation_from_stats(
+                asset_stats[valid_assets[index_a[k]]], asset_stats[valid_assets[index_b[k]]]
+            )
+        keep = ~in_matrix | (candidate & (pair_correlation >= quick_filter_threshold))
+        index_a, index_b, pair_correlation = index_a[keep], index_b[keep], pair_correlation[keep]
+        position_a, position_b, in_matrix = position_a[keep], position_b[keep], in_matrix[keep]
+        
+        # Test pairs (with optimized parallel processing); outcomes stay in pair order
+        outcomes: List[Optional[Tuple[Dict, np.ndarray]]] = [None] * len(index_a)
+        thread_pairs = list(range(len(index_a)))
+        processed = n_pairs - len(index_a)
+        
+        # Complete-history pairs are tested together on the shared price rows (batched
+        # regressions and ADF pre-tests), in worker processes when there are enough of them
+        matrix_pairs = np.flatnonzero(in_matrix)
+        if len(matrix_pairs) > 0:
+            matrix_assets = sorted(corr_position, key=corr_position.get)
+            price_rows = np.stack([asset_stats[asset].prices for asset in matrix_assets])
+            triples = list(zip(
+                position_a[matrix_pairs].tolist(),
+                position_b[matrix_pairs].tolist(),
+                pair_correlation[matrix_pairs].tolist()
+            ))
+            use_processes = PROCESS_POOL_WORKERS > 1 and len(matrix_pairs) >= PROCESS_POOL_MIN_PAIRS
+            logger.info(
+                f"Testing {len(matrix_pairs)} complete-history pairs in batch"
+                + (f" on {PROCESS_POOL_WORKERS} processes" if use_processes else "")
+            )
+            try:
+                if use_processes:
+                    tested = self._test_pairs_in_processes(matrix_assets, price_rows, triples, settings)
+                else:
+                    tested = _test_matrix_pairs(matrix_assets, price_rows, triples, settings)
+                for k, outcome in zip(matrix_pairs.tolist(), tested):
+                    outcomes[k] = outcome
+                thread_pairs = np.flatnonzero(~in_matrix).tolist()
+                processed += len(matrix_pairs)
+            except Exception as e:
+                logger.warning(f"Batch pair testing failed ({e}), testing all pairs on threads")
+                if use_processes:
+                    _discard_process_pool()
         
-        # Test pairs (with optimized parallel processing)
-        results = []
         # Reduced workers to avoid overwhelming the cache and API
         # Since data is pre-loaded, fewer workers should be sufficient
-        max_workers = min(4, len(pairs))  # Reduced from 6 to 4 to avoid cache conflicts
+        max_workers = max(1, min(4, len(thread_pairs)))  # Reduced from 6 to 4 to avoid cache conflicts
         
-        logger.info(f"Testing {len(pairs)} pairs with {max_workers} workers")
-        processed = 0
+        logger.info(f"Testing {len(thread_pairs)} of {n_pairs} pairs with {max_workers} workers")
         
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(
+            futures = []
+            for k in thread_pairs:
+                asset_a, asset_b = valid_assets[index_a[k]], valid_assets[index_b[k]]
+                correlation = float(pair_correlation[k])
+                futures.append(executor.submit(
                     self._test_pair,
                     asset_a,
                     asset_b,
-                    config
-                )
-                for asset_a, asset_b in pairs
-            ]
+                    settings,
+                    None if np.isnan(correlation) else correlation,
+                    (asset_stats[asset_a], asset_stats[asset_b])
+                    if asset_a in asset_stats and asset_b in asset_stats else None,
+                    (asset_prices[asset_a], asset_prices[asset_b])
+                    if asset_a not in asset_stats or asset_b not in asset_stats else None
+                ))
             
-            for future in futures:
+            for k, future in zip(thread_pairs, futures):
                 try:
                     # Reduced timeout since data is cached (30 seconds should be enough)
-                    result = future.result(timeout=30)
-                    if result:
-                        results.append(result)
+                    outcomes[k] = future.result(timeout=30)
                     processed += 1
                     if processed % 50 == 0:
-                        logger.info(f"Processed {processed}/{len(pairs)} pairs, found {len(results)} valid pairs so far")
+                        logger.info(f"Processed {processed}/{n_pairs} pairs")
                 except Exception as e:
                     processed += 1
                     if processed % 100 == 0:
-                        logger.debug(f"Processed {processed}/{len(pairs)} pairs")
+                        logger.debug(f"Processed {processed}/{n_pairs} pairs")
                     continue
         
-        logger.info(f"Completed testing {len(pairs)} pairs, found {len(results)} valid pairs")
+        results = []
+        spreads = []  # Spread of each result, for the batched Hurst calculation
+        for outcome in outcomes:
+            if outcome:
+                result, spread = outcome
+                results.append(result)
+                spreads.append(spread)
+        
+        logger.info(f"Completed testing {n_pairs} pairs, found {len(results)} valid pairs")
+        
+        # Numeric columns of the results, so filtering, scoring and ranking run on arrays
+        correlations = np.fromiter((r['correlation'] for r in results), dtype=float, count=len(results))
+        adf_pvalues = np.fromiter((r['adf_pvalue'] for r in results), dtype=float, count=len(results))
         
         # Filter and rank results
-        filtered_results = [
-            r for r in results
-            if r['correlation'] >= config.min_correlation
-            and r['adf_pvalue'] <= config.max_adf_pvalue
-        ]
-        
-        # Sort by combined score (correlation * (1 - adf_pvalue))
-        filtered_results.sort(
-            key=lambda x: x['correlation'] * (1 - x['adf_pvalue']),
-            reverse=True
-        )
+        keep = (correlations >= config.min_correlation) & (adf_pvalues <= config.max_adf_pvalue)
+        if config.min_composite_score > 0:
+            # Best reachable composite score is with a Hurst score of 1 (H = 0.5); pairs that
+            # cannot reach the minimum even then are dropped before computing their Hurst
+            best_scores = self._composite_scores(correlations, adf_pvalues, np.full(len(results), 0.5))
+            keep &= best_scores >= config.min_composite_score
+        kept = np.flatnonzero(keep)
+        
+        # Optional: Hurst exponents of all kept spreads in one batched pass (NaN if undefined)
+        if config.include_hurst:
+            hurst_values = np.array(
+                self.hurst_calculator.generalized_hurst_exponents([spreads[i] for i in kept]), dtype=float
+            )
+        else:
+            hurst_values = np.full(len(kept), np.nan)
+        composite_scores = self._composite_scores(correlations[kept], adf_pvalues[kept], hurst_values)
+        if config.min_composite_score > 0:
+            passing = composite_scores >= config.min_composite_score
+            kept, hurst_values, composite_scores = kept[passing], hurst_values[passing], composite_scores[passing]
+        
+        # Sort by combined score (correlation * (1 - adf_pvalue)), best first; the stable
+        # sort of the negated score keeps equal scores in pair order
+        order = np.argsort(-(correlations[kept] * (1 - adf_pvalues[kept])), kind='stable')
+        filtered_results = []
+        for j in order:
+            result = results[kept[j]]
+            result['hurst_exponent'] = None if np.isnan(hurst_values[j]) else float(hurst_values[j])
+            result['composite_score'] = float(composite_scores[j])
+            filtered_results.append(result)
         
         # Add metadata to results
         for idx, result in enumerate(filtered_results):
@@ -203,7 +523,7 @@ class PairsScreener:
         stats = {
             "assets_count": len(assets),
             "valid_assets_count": len(valid_assets),
-            "pairs_generated": len(pairs),
+            "pairs_generated": n_pairs,
             "pairs_processed": processed,
             "pairs_found": len(filtered_results),
             "started_at": datetime.utcnow().isoformat(),
@@ -212,6 +532,7 @@ class PairsScreener:
                 "min_correlation": config.min_correlation,
                 "max_adf_pvalue": config.max_adf_pvalue,
                 "include_hurst": config.include_hurst,
+                "min_composite_score": config.min_composite_score,
                 "min_volume_usd": config.min_volume_usd,
                 "max_assets": config.max_assets,
             },
@@ -219,127 +540,218 @@ class PairsScreener:
 
         return {"results": filtered_results, "stats": stats}
     
+    def _precompute_correlations(
+        self,
+        prices: pd.DataFrame
+    ) -> Tuple[np.ndarray, Dict[str, int], Dict[str, AssetStatsCache]]:
+        """
+        Return correlations of all assets whose prices cover every screened date
+        
+        For two such assets the pair-aligned prices are the full date index, so one
+        correlation matrix gives what calculate_correlation computes per pair, and each
+        asset's prices can be shared by all of its pairs as they are. The matrix is
+        computed in float32 since it only feeds the pre-filter. Assets with gaps are
+        left out and keep the per-pair calculation.
+        
+        Args:
+            prices: Date-aligned prices, one column per asset (NaN where missing)
+            
+        Returns:
+            Tuple of (float32-precision correlation matrix, asset -> matrix position,
+            asset -> cached stats)
+        """
+        try:
+            complete = [asset for asset in prices.columns if prices[asset].notna().all()]
+            if len(complete) < 2:
+                return np.zeros((0, 0)), {}, {}
+            
+            complete_prices = prices[complete].to_numpy(dtype=float)
+            corr_matrix = self.correlation_analyzer.pairwise_correlation_matrix(
+                complete_prices, dtype=np.float32
+            )
+            asset_stats = {
+                asset: AssetStatsCache.from_prices(complete_prices[:, i])
+                for i, asset in enumerate(complete)
+            }
+            logger.info(f"Precomputed correlations for {len(complete)} assets with complete history")
+            return corr_matrix, {asset: i for i, asset in enumerate(complete)}, asset_stats
+        except Exception as e:
+            logger.warning(f"Could not precompute correlation matrix: {e}, using per-pair correlation")
+            return np.zeros((0, 0)), {}, {}
+    
     def _test_pair(
         self,
         asset_a: str,
         asset_b: str,
-        config: ScreeningConfig
-    ) -> Optional[Dict]:
+        settings: PairTestSettings,
+        precomputed_correlation: Optional[float] = None,
+        asset_stats: Optional[Tuple[AssetStatsCache, AssetStatsCache]] = None,
+        pair_prices: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ) -> Optional[Tuple[Dict, np.ndarray]]:
         """
         Test a single pair for cointegration and correlation
         
+        Hurst exponent and composite score are added later by screen_pairs, which
+        computes the Hurst exponents of all kept spreads in one batch.
+        
         Args:
             asset_a: First asset symbol
             asset_b: Second asset symbol
-            config: Screening configuration
+            settings: Pair test settings of the screening
+            precomputed_correlation: Full-period return correlation from the correlation
+                matrix, if available (skips the per-pair calculation)
+            asset_stats: Cached (asset A, asset B) statistics on the same dates, if
+                available (skips loading and aligning the pair's prices)
+            pair_prices: Preloaded (asset A, asset B) price arrays on a shared date index
+                (NaN where missing), used when asset_stats is not available (skips
+                get_price_series)
             
         Returns:
-            Dictionary with test results or None if pair is invalid
+            Tuple of (dictionary with test results, spread) or None if pair is invalid
         """
         try:
-            # Load price data (uses cache if available)
-            price_a = self.data_loader.get_price_series(
-                asset_a,
-                days=config.lookback_days,
-                db=self.db
-            )
-            price_b = self.data_loader.get_price_series(
-                asset_b,
-                days=config.lookback_days,
-                db=self.db
-            )
-            
-            # Check data availability (should already be validated, but double-check)
-            min_required_days = int(config.lookback_days * 0.8)
-            if len(price_a) < min_required_days or len(price_b) < min_required_days:
-                # This shouldn't happen if filtering worked correctly, but log it
-                logger.warning(f"Pair {asset_a}-{asset_b} has insufficient data: {len(price_a)} and {len(price_b)} days (need {min_required_days})")
-                return None
+            if asset_stats is not None:
+                # Prices already loaded, checked and date-aligned during screening setup
+                stats_a, stats_b = asset_stats
+                values_a, values_b = stats_a.prices, stats_b.prices
+            else:
+                if pair_prices is not None:
+                    # Histories loaded in bulk during screening setup, on the same dates
+                    price_a, price_b = pair_prices
+                    days_a = int(np.count_nonzero(~np.isnan(price_a)))
+                    days_b = int(np.count_nonzero(~np.isnan(price_b)))
+                else:
+                    # Load price data (uses cache if available)
+                    price_a = self.data_loader.get_price_series(
+                        asset_a,
+                        days=settings.lookback_days,
+                        db=self.db
+                    )
+                    price_b = self.data_loader.get_price_series(
+                        asset_b,
+                        days=settings.lookback_days,
+                        db=self.db
+                    )
+                    days_a, days_b = len(price_a), len(price_b)
+                
+                # Check data availability (should already be validated, but double-check)
+                min_required_days = int(settings.lookback_days * 0.8)
+                if days_a < min_required_days or days_b < min_required_days:
+                    # This shouldn't happen if filtering worked correctly, but log it
+                    logger.warning(f"Pair {asset_a}-{asset_b} has insufficient data: {days_a} and {days_b} days (need {min_required_days})")
+                    return None
+                
+                # Align once (a plain NaN mask for preloaded arrays); every test below works
+                # on the same NaN-free arrays
+                values_a, values_b = align_prices(price_a, price_b)
             
             # OPTIMIZATION: Fast correlation check FIRST (before slow cointegration test)
             # This filters out bad pairs quickly
-            corr, min_corr, max_corr = self.correlation_analyzer.calculate_correlation(
-                price_a, price_b
-            )
-            
-            # Quick pre-filter: reject pairs with very low correlation (not too strict)
-            # Use 90% of threshold to avoid rejecting good pairs, but filter out bad ones
-            quick_filter_threshold = max(0.7, config.min_correlation * 0.9)
-            if corr < quick_filter_threshold:
-                return None  # Fast rejection before expensive cointegration test
-            
-            # Now do the expensive cointegration test (only for pairs with good correlation)
-            is_cointegrated, beta, adf_stat, adf_pvalue, spread_std = \
-                self.cointegration_tester.engle_granger_test(price_a, price_b)
-            
-            if not is_cointegrated:
-                return None
-            
-            # Final strict correlation check
-            if corr < config.min_correlation:
-                return None
-            
-            # Get alpha from regression for accurate spread calculation
-            # Re-run regression to get alpha
-            aligned = pd.DataFrame({'a': price_a, 'b': price_b}).dropna()
-            if len(aligned) < 50:
-                return None
-            
-            from statsmodels.regression.linear_model import OLS
-            import numpy as np
-            X = aligned['b'].values.reshape(-1, 1)
-            y = aligned['a'].values
-            X_with_const = np.column_stack([np.ones(len(X)), X])
-            model = OLS(y, X_with_const).fit()
-            alpha = model.params[0]
-            
-            # Calculate spread for additional metrics
-            spread = self.cointegration_tester.calculate_spread(price_a, price_b, beta, alpha)
-            mean_spread = spread.mean()
-            
-            # Calculate current z-score
-            zscore = self.cointegration_tester.calculate_zscore(spread)
-            current_zscore = float(zscore.iloc[-1]) if len(zscore) > 0 else 0.0
-            
-            result = {
-                'asset_a': asset_a,
-                'asset_b': asset_b,
-                'correlation': corr,
-                'min_correlation': min_corr,
-                'max_correlation': max_corr,
-                'adf_pvalue': adf_pvalue,
-                'adf_statistic': adf_stat,
-                'beta': beta,
-                'spread_std': spread_std,
-                'mean_spread': mean_spread,
-                'current_zscore': current_zscore
-            }
-            
-            # Optional: Calculate Hurst exponent
-            if config.include_hurst:
-                hurst = self.hurst_calculator.generalized_hurst_exponent(spread)
-                result['hurst_exponent'] = hurst
+            if precomputed_correlation is not None:
+                corr = min_corr = max_corr = float(precomputed_correlation)
+            elif asset_stats is not None:
+                corr = min_corr = max_corr = self.correlation_analyzer.correlation_from_stats(*asset_stats)
             else:
-                result['hurst_exponent'] = None
-            
-            # Calculate composite score (pair strength indicator)
-            # Higher correlation + lower ADF p-value + lower Hurst = better pair
-            hurst = result.get('hurst_exponent', 0.5)
-            if hurst is None:
-                hurst = 0.5
-            
-            correlation_score = corr  # 0-1
-            adf_score = 1.0 - (adf_pvalue / 0.1)  # 0-1 (better if lower p-value)
-            adf_score = max(0.0, min(1.0, adf_score))  # Clamp to [0, 1]
-            hurst_score = 1.0 - abs(hurst - 0.5) * 2  # 0-1 (better if closer to 0.5)
-            hurst_score = max(0.0, min(1.0, hurst_score))  # Clamp to [0, 1]
-            
-            composite_score = (correlation_score * 0.5 + adf_score * 0.3 + hurst_score * 0.2) * 100
-            result['composite_score'] = composite_score
+                corr, min_corr, max_corr = self.correlation_analyzer.calculate_correlation(
+                    values_a, values_b
+                )
             
-            return result
+            return _test_aligned_pair(
+                asset_a, asset_b, values_a, values_b, (corr, min_corr, max_corr), settings
+            )
             
         except Exception as e:
             logger.error(f"Error testing pair {asset_a}-{asset_b}: {e}")
             return None
-
+    
+    def _test_pairs_in_processes(
+        self,
+        matrix_assets: List[str],
+        price_rows: np.ndarray,
+        pairs: List[Tuple[int, int, float]],
+        settings: PairTestSettings
+    ) -> List[Optional[Tuple[Dict, np.ndarray]]]:
+        """
+        Test complete-history pairs in the worker process pool
+        
+        The price rows are copied once into a shared memory block that every worker
+        maps, so tasks carry only chunks of (row A, row B, correlation) triples and
+        no process holds its own copy of the price matrix.
+        
+        Args:
+            matrix_assets: Asset symbol of each price row
+            price_rows: Prices (assets x dates) on the common dates
+            pairs: (row A, row B, precomputed correlation) of each pair to test
+            settings: Pair test settings of the screening
+            
+        Returns:
+            Outcome of each pair, in order (None if the pair is invalid)
+        """
+        price_rows = np.ascontiguousarray(price_rows, dtype=np.float64)
+        shared = SharedMemory(create=True, size=max(price_rows.nbytes, 1))
+        try:
+            np.ndarray(price_rows.shape, dtype=np.float64, buffer=shared.buf)[:] = price_rows
+            pool = _get_process_pool()
+            # A few chunks per worker keeps them busy without one task per pair
+            chunk_size = max(1, -(-len(pairs) // (PROCESS_POOL_WORKERS * 4)))
+            futures = [
+                pool.submit(
+                    _test_pairs_worker,
+                    shared.name,
+                    price_rows.shape,
+                    matrix_assets,
+                    pairs[start:start + chunk_size],
+                    settings
+                )
+                for start in range(0, len(pairs), chunk_size)
+            ]
+            outcomes = []
+            for future in futures:
+                outcomes.extend(future.result())
+            return outcomes
+        finally:
+            shared.close()
+            shared.unlink()
+    
+    @staticmethod
+    def _quick_filter_threshold(config: ScreeningConfig) -> float:
+        """
+        Correlation below which a pair is rejected before the cointegration test
+        
+        Uses 90% of the configured threshold (at least 0.7) to avoid rejecting good
+        pairs, but filter out bad ones.
+        
+        Args:
+            config: Screening configuration
+            
+        Returns:
+            Pre-filter correlation threshold
+        """
+        return max(0.7, config.min_correlation * 0.9)
+    
+    @staticmethod
+    def _composite_scores(
+        corr: np.ndarray,
+        adf_pvalue: np.ndarray,
+        hurst: np.ndarray
+    ) -> np.ndarray:
+        """
+        Calculate composite scores (pair strength indicator) of many pairs
+        
+        Higher correlation + lower ADF p-value + Hurst closer to 0.5 = better pair
+        
+        Args:
+            corr: Return correlation of each pair
+            adf_pvalue: ADF p-value of each spread
+            hurst: Hurst exponent of each spread (NaN counts as 0.5)
+            
+        Returns:
+            Composite scores from 0 to 100
+        """
+        hurst = np.where(np.isnan(hurst), 0.5, hurst)
+        
+        correlation_score = corr  # 0-1
+        adf_score = np.clip(1.0 - (adf_pvalue / 0.1), 0.0, 1.0)  # 0-1 (better if lower p-value)
+        hurst_score = np.clip(1.0 - np.abs(hurst - 0.5) * 2, 0.0, 1.0)  # 0-1 (better if closer to 0.5)
+        
+        return (correlation_score * 0.5 + adf_score * 0.3 + hurst_score * 0.2) * 100
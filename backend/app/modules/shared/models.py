@@ -24,4 +24,5 @@ class ScreeningConfig(BaseModel):
     max_adf_pvalue: float = 0.10
     include_hurst: bool = False
     min_volume_usd: float = 1_000_000  # 1M USD minimum volume
+    min_composite_score: float = 0.0  # Drop pairs scoring below this (0-100, 0 = keep all)
 